@@ -4,10 +4,30 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
-import yfinance as yf
 from streamlit_option_menu import option_menu
 import sqlite3
 import hashlib
+import time
+import price_store
+import anomalies
+import budgets
+import expenses
+import rules
+import cashflow
+import fx
+from market_data import (fetch_histories, refresh_in_background, build_quote_frame, price_matrix,
+                         PERIOD_DAYS, REFRESH_INTERVAL)
+from downsampling import downsample_series, downsample_frame
+import indicators
+from symbols import search_symbols
+from expenses import add_expense, add_expenses, load_expenses, expense_version, expense_categories, bucket_expenses
+from recurring import detect_recurring
+from categorizer import suggest_category, suggest_categories
+from forecasting import forecast_user_expenses, HORIZON
+from portfolio import ASSET_CLASSES, add_transaction, ledger_version, portfolio_snapshot, history_period
+from risk import portfolio_risk, benchmark_comparison, BENCHMARKS
+from watchlists import (get_watchlist, add_to_watchlist, remove_from_watchlist,
+                        ensure_default_watchlist, touch_user, plan_refresh, symbol_market)
 
 # ============ PAGE CONFIG ============
 st.set_page_config(
@@ -499,6 +519,49 @@ def init_db():
                   target_date TEXT,
                   priority TEXT)''')
     
+    # Per-user market watchlists
+    c.execute('''CREATE TABLE IF NOT EXISTS watchlists
+                 (id INTEGER PRIMARY KEY,
+                  user_id INTEGER,
+                  symbol TEXT,
+                  added_at TEXT,
+                  UNIQUE(user_id, symbol))''')
+    
+    # Investment transactions; holdings are derived from these
+    c.execute('''CREATE TABLE IF NOT EXISTS transactions
+                 (id INTEGER PRIMARY KEY,
+                  user_id INTEGER,
+                  date TEXT,
+                  symbol TEXT,
+                  asset_class TEXT,
+                  type TEXT,
+                  quantity REAL,
+                  price REAL)''')
+    
+    # Local daily price store with forward split/dividend adjustment
+    price_store.create_tables(c)
+    
+    # In-place edit counter for expense caches, and user categorization rules
+    expenses.create_tables(c)
+    rules.create_tables(c)
+    
+    # Unusual-expense detector state, raised alerts and per-user alert settings
+    anomalies.create_tables(c)
+    
+    # Category budgets and their running monthly spend counters
+    budgets.create_tables(c)
+    
+    # Income ledger and running monthly income / expense totals
+    cashflow.create_tables(c)
+    
+    # Daily INR exchange rates, used to value foreign-currency holdings
+    fx.create_tables(c)
+    
+    # Last time each user loaded a page, used to plan shared market refreshes
+    c.execute('''CREATE TABLE IF NOT EXISTS user_activity
+                 (user_id INTEGER PRIMARY KEY,
+                  last_seen TEXT)''')
+    
     conn.commit()
     conn.close()
 
@@ -520,6 +583,8 @@ def login_user(email, password):
     if result:
         st.session_state.user_id = result[0]
         st.session_state.authenticated = True
+        ensure_default_watchlist(result[0])
+        st.session_state.watchlist_seeded = True
         return True
     return False
 
@@ -605,6 +670,37 @@ def create_navigation():
     )
 
 # ============ DASHBOARD ============
+def symbol_picker(label, key):
+    # Searches the local ticker master; unlisted Yahoo codes can still be used as typed
+    query = st.text_input(label, key=f"{key}_query")
+    if not query.strip():
+        return ""
+    matches = search_symbols(query)
+    options = [f"{symbol} — {name}" for symbol, name, _ in matches]
+    typed = query.strip().upper()
+    if typed not in [symbol for symbol, _, _ in matches]:
+        options.append(f"{typed} — (use as typed)")
+    choice = st.selectbox("Matching Symbols", options, key=f"{key}_match")
+    return choice.split(" — ")[0]
+
+def add_indicator_overlays(fig, symbol, close, overlays, window, start):
+    # Dashed overlay lines drawn on top of a symbol's price trace. Indicators are
+    # computed over the full cached history and clipped to the displayed range.
+    if "SMA" in overlays:
+        series = downsample_series(indicators.compute(symbol, close, 'SMA', window=window).loc[start:])
+        fig.add_trace(go.Scatter(x=series.index, y=series.values, name=f"{symbol} SMA {window}",
+                                 mode='lines', line={'dash': 'dot', 'width': 1}))
+    if "EMA" in overlays:
+        series = downsample_series(indicators.compute(symbol, close, 'EMA', window=window).loc[start:])
+        fig.add_trace(go.Scatter(x=series.index, y=series.values, name=f"{symbol} EMA {window}",
+                                 mode='lines', line={'dash': 'dash', 'width': 1}))
+    if "Bollinger Bands" in overlays:
+        bands = indicators.compute(symbol, close, 'Bollinger', window=window).loc[start:]
+        for band in ['Upper', 'Lower']:
+            series = downsample_series(bands[band])
+            fig.add_trace(go.Scatter(x=series.index, y=series.values, name=f"{symbol} BB {band}",
+                                     mode='lines', line={'dash': 'dot', 'width': 1}, opacity=0.6))
+
 def dashboard():
     st.markdown("<h1 style='text-align: center;'>Financial Dashboard</h1>", unsafe_allow_html=True)
     
@@ -642,29 +738,76 @@ def dashboard():
     # Market Overview
     st.markdown("### Market Overview")
     
-    # Define symbols for Indian and US markets
-    indian_symbols = ['RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'WIPRO.NS']
-    us_symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA']
+    # Sessions that logged in before watchlists existed get the defaults once;
+    # a list the user emptied in this session stays empty
+    if not st.session_state.get('watchlist_seeded'):
+        ensure_default_watchlist(st.session_state.user_id)
+        st.session_state.watchlist_seeded = True
+    
+    # Manage the user's watchlist
+    with st.expander("Manage Watchlist"):
+        col1, col2 = st.columns(2)
+        with col1:
+            new_symbol = symbol_picker("Search Symbol (name or code, e.g. Infosys or NVDA)", "watchlist")
+            if st.button("Add to Watchlist") and new_symbol:
+                if add_to_watchlist(st.session_state.user_id, new_symbol):
+                    st.success(f"Added {new_symbol} to your watchlist")
+                else:
+                    st.info(f"{new_symbol} is already in your watchlist")
+        with col2:
+            to_remove = st.multiselect("Remove Symbols", get_watchlist(st.session_state.user_id))
+            if st.button("Remove Selected") and to_remove:
+                for symbol in to_remove:
+                    remove_from_watchlist(st.session_state.user_id, symbol)
+                st.rerun()
+    
+    # Split the user's watchlist by market
+    watchlist = get_watchlist(st.session_state.user_id)
+    indian_symbols = [symbol for symbol in watchlist if symbol_market(symbol) == 'Indian']
+    us_symbols = [symbol for symbol in watchlist if symbol_market(symbol) == 'US']
     
     # Combine symbols for display
     all_symbols = indian_symbols + us_symbols
-    market_data = pd.DataFrame()
+    if not all_symbols:
+        st.info("Your watchlist is empty. Add symbols under Manage Watchlist to see market data.")
+        return
     
-    for symbol in all_symbols:
-        try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period='1d')
-            if not hist.empty:
-                market_data.loc[symbol, 'Price'] = hist['Close'].iloc[-1]
-                market_data.loc[symbol, 'Change'] = hist['Close'].iloc[-1] - hist['Open'].iloc[-1]
-                market_data.loc[symbol, 'Change %'] = ((hist['Close'].iloc[-1] - hist['Open'].iloc[-1]) / hist['Open'].iloc[-1]) * 100
-                market_data.loc[symbol, 'Market'] = 'Indian' if symbol in indian_symbols else 'US'
-        except Exception as e:
-            st.warning(f"Could not fetch data for {symbol}: {str(e)}")
-            continue
+    trend_periods = {"1mo": "Last Month", "6mo": "Last 6 Months", "1y": "Last Year", "5y": "Last 5 Years"}
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        trend_period = st.selectbox("Trend Period", list(trend_periods.keys()),
+                                    format_func=lambda period: trend_periods[period])
+        indicator_window = st.number_input("Indicator Window", min_value=5, max_value=200, value=20)
+    with col2:
+        overlays = st.multiselect("Chart Overlays", ["SMA", "EMA", "Bollinger Bands"])
+
+    # One budgeted fetch of this user's symbols serves both the quote table and the trend charts.
+    touch_user(st.session_state.user_id)
+    # At least a year is fetched so indicators have warm-up data before the shown range
+    fetch_period = trend_period if PERIOD_DAYS[trend_period] >= PERIOD_DAYS['1y'] else '1y'
+    histories, stale, failed = fetch_histories(all_symbols, period=fetch_period)
+    # Other active users' symbols are refreshed without waiting, so their next load is served from cache
+    refresh_in_background(sorted(set(plan_refresh()) - set(all_symbols)), period=fetch_period)
+    
+    market_data, closes = build_quote_frame(histories)
+    
+    if failed:
+        st.warning(f"Could not fetch data for: {', '.join(failed)}")
     
     if not market_data.empty:
+        trend_months = {"1mo": 1, "6mo": 6, "1y": 12, "5y": 60}
+        shown_closes = closes.loc[closes.index[-1] - pd.DateOffset(months=trend_months[trend_period]):]
+        
         st.markdown("#### Real-Time Market Data")
+        if stale:
+            oldest = min(stale.values())
+            st.markdown(
+                f"<span style='background-color: {COLORS['warning']}; color: {COLORS['text_light']}; "
+                f"padding: 2px 8px; border-radius: 8px; font-size: 12px;'>"
+                f"⏱ Stale: showing last-known prices for {len(stale)} symbol(s) as of {oldest.strftime('%H:%M:%S')}"
+                f"</span>",
+                unsafe_allow_html=True
+            )
         st.dataframe(market_data.style.format({
             'Price': '{:,.2f}',
             'Change': '{:,.2f}',
@@ -672,18 +815,14 @@ def dashboard():
         }))
         
         # Market Trends Chart for Indian Market
-        st.markdown("#### Indian Market Trends (Last Month)")
+        st.markdown(f"#### Indian Market Trends ({trend_periods[trend_period]})")
         fig_indian = go.Figure()
-        for symbol in indian_symbols:
-            try:
-                stock = yf.Ticker(symbol)
-                hist = stock.history(period='1mo')
-                if not hist.empty:
-                    fig_indian.add_trace(go.Scatter(x=hist.index, y=hist['Close'],
-                                                    name=symbol, mode='lines'))
-            except Exception as e:
-                st.warning(f"Could not fetch historical data for {symbol}: {str(e)}")
-                continue
+        for symbol in closes.columns.intersection(indian_symbols):
+            series = downsample_series(shown_closes[symbol])
+            fig_indian.add_trace(go.Scatter(x=series.index, y=series.values,
+                                            name=symbol, mode='lines'))
+            add_indicator_overlays(fig_indian, symbol, closes[symbol], overlays, indicator_window,
+                                   shown_closes.index[0])
         
         fig_indian.update_layout(
             title='Indian Stock Performance',
@@ -694,18 +833,14 @@ def dashboard():
         st.plotly_chart(fig_indian, use_container_width=True)
         
         # Market Trends Chart for US Market
-        st.markdown("#### US Market Trends (Last Month)")
+        st.markdown(f"#### US Market Trends ({trend_periods[trend_period]})")
         fig_us = go.Figure()
-        for symbol in us_symbols:
-            try:
-                stock = yf.Ticker(symbol)
-                hist = stock.history(period='1mo')
-                if not hist.empty:
-                    fig_us.add_trace(go.Scatter(x=hist.index, y=hist['Close'],
-                                                name=symbol, mode='lines'))
-            except Exception as e:
-                st.warning(f"Could not fetch historical data for {symbol}: {str(e)}")
-                continue
+        for symbol in closes.columns.intersection(us_symbols):
+            series = downsample_series(shown_closes[symbol])
+            fig_us.add_trace(go.Scatter(x=series.index, y=series.values,
+                                        name=symbol, mode='lines'))
+            add_indicator_overlays(fig_us, symbol, closes[symbol], overlays, indicator_window,
+                                   shown_closes.index[0])
         
         fig_us.update_layout(
             title='US Stock Performance',
@@ -714,10 +849,48 @@ def dashboard():
             height=400
         )
         st.plotly_chart(fig_us, use_container_width=True)
+        
+        # Momentum indicators for one symbol
+        st.markdown("#### Momentum Indicators")
+        detail_symbol = st.selectbox("Symbol", list(closes.columns))
+        close = closes[detail_symbol]
+        col1, col2 = st.columns(2)
+        with col1:
+            series = downsample_series(indicators.compute(detail_symbol, close, 'RSI', window=14).loc[shown_closes.index[0]:])
+            fig_rsi = go.Figure(go.Scatter(x=series.index, y=series.values, name='RSI 14', mode='lines'))
+            fig_rsi.add_hline(y=70, line_dash='dot', line_color=COLORS['error'])
+            fig_rsi.add_hline(y=30, line_dash='dot', line_color=COLORS['success'])
+            fig_rsi.update_layout(title=f'{detail_symbol} RSI (14)', yaxis_range=[0, 100], height=300)
+            st.plotly_chart(fig_rsi, use_container_width=True)
+        with col2:
+            macd = indicators.compute(detail_symbol, close, 'MACD').loc[shown_closes.index[0]:]
+            fig_macd = go.Figure()
+            for column in ['MACD', 'Signal']:
+                series = downsample_series(macd[column])
+                fig_macd.add_trace(go.Scatter(x=series.index, y=series.values, name=column, mode='lines'))
+            histogram = downsample_series(macd['Histogram'])
+            fig_macd.add_trace(go.Bar(x=histogram.index, y=histogram.values, name='Histogram'))
+            fig_macd.update_layout(title=f'{detail_symbol} MACD (12, 26, 9)', height=300)
+            st.plotly_chart(fig_macd, use_container_width=True)
     else:
         st.error("Unable to fetch market data for any symbols. Please check your internet connection or try again later.")
 
 # ============ EXPENSE TRACKER ============
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_expense_buckets(user_id, version, start=None, end=None, categories=None):
+    """
+    Expenses and their time buckets, rebuilt only when the expense data
+    changes. Date and category filters are applied in SQL.
+    """
+    df = load_expenses(user_id, start, end, list(categories) if categories else None)
+    return df, bucket_expenses(df)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_recurring_expenses(user_id, version):
+    """Recurring payments over the whole history, redetected only when expenses change."""
+    df, _ = cached_expense_buckets(user_id, version)
+    return detect_recurring(df)
+
 def expense_tracker():
     st.markdown("<h1 style='text-align: center;'>Smart Expense Tracker</h1>", unsafe_allow_html=True)
 
@@ -729,55 +902,159 @@ def expense_tracker():
             expense_date = st.date_input("Date", datetime.now())
             expense_amount = st.number_input("Amount (₹)", min_value=0.0, step=100.0)
 
+        with col3:
+            expense_description = st.text_area("Description", height=100)
+
         with col2:
+            # Pre-select the category the user's history suggests for this description
             default_categories = ["Needs", "Wants", "Investments", "Savings", "Entertainment", "Health", "Other"]
-            expense_category = st.selectbox("Category", default_categories)
+            # A matching rule wins over the learned suggestion
+            suggested = None
+            if st.session_state.user_id and expense_description:
+                suggested = (rules.match_category(st.session_state.user_id, expense_description)
+                             or suggest_category(st.session_state.user_id, expense_description))
+            if suggested in default_categories:
+                category_index = default_categories.index(suggested)
+            else:
+                category_index = default_categories.index("Other") if suggested else 0
+            expense_category = st.selectbox("Category", default_categories, index=category_index)
             if expense_category == "Other":
-                expense_category = st.text_input("Specify Category")
-
-        with col3:
-            expense_description = st.text_area("Description", height=100)
+                expense_category = st.text_input("Specify Category", value=suggested or "")
+            if suggested:
+                st.caption(f"Suggested from your history: {suggested}")
 
         if st.button("Add Expense"):
             if st.session_state.user_id:
-                conn = sqlite3.connect('finance_tracker.db')
-                c = conn.cursor()
-                c.execute(
-                    """
-                    INSERT INTO expenses (user_id, date, amount, category, description)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (
-                        st.session_state.user_id,
-                        expense_date.strftime("%Y-%m-%d"),
-                        expense_amount,
-                        expense_category,
-                        expense_description,
-                    ),
+                alert = add_expense(
+                    st.session_state.user_id,
+                    expense_date.strftime("%Y-%m-%d"),
+                    expense_amount,
+                    expense_category,
+                    expense_description,
                 )
-                conn.commit()
-                conn.close()
                 st.success("Expense added successfully!")
+                if alert:
+                    st.warning(
+                        f"⚠️ This {alert['category']} expense is unusually high; "
+                        f"you typically spend around ₹{alert['expected']:,.2f}."
+                    )
+                    anomalies.send_pending_alerts(st.session_state.user_id)
             else:
                 st.error("User not authenticated. Please log in.")
 
+    # --- Import Expenses ---
+    if st.session_state.user_id:
+        with st.expander("Import Expenses (CSV)"):
+            st.caption("Columns: date, amount, description and optionally category. "
+                       "Rows without a category are categorized by your rules, then from your history.")
+            uploaded = st.file_uploader("CSV file", type="csv", key="expense_import")
+            if uploaded is not None:
+                imported = pd.read_csv(uploaded)
+                imported.columns = [column.strip().lower() for column in imported.columns]
+                if not {"date", "amount", "description"}.issubset(imported.columns):
+                    st.error("The file needs date, amount and description columns.")
+                else:
+                    if "category" not in imported.columns:
+                        imported["category"] = None
+                    missing = imported["category"].isna() | (imported["category"].astype(str).str.strip() == "")
+                    started = time.perf_counter()
+                    by_rule = rules.match_categories(st.session_state.user_id, imported.loc[missing, "description"])
+                    predicted = suggest_categories(st.session_state.user_id,
+                                                   imported.loc[missing, "description"].fillna("").tolist())
+                    elapsed = time.perf_counter() - started
+                    imported.loc[missing, "category"] = [
+                        rule or category or "Other" for rule, category in zip(by_rule, predicted)]
+                    imported["date"] = pd.to_datetime(imported["date"]).dt.strftime("%Y-%m-%d")
+                    st.dataframe(imported[["date", "amount", "category", "description"]])
+                    if missing.any():
+                        st.caption(f"Categorized {missing.sum()} rows in {elapsed * 1000:.1f} ms "
+                                   f"({missing.sum() / max(elapsed, 1e-9):,.0f} rows/s).")
+                    if st.button("Import Expenses"):
+                        alerts = add_expenses(st.session_state.user_id, list(zip(
+                            imported["date"], imported["amount"].astype(float),
+                            imported["category"], imported["description"].fillna(""))))
+                        flagged = sum(alert is not None for alert in alerts)
+                        st.success(f"Imported {len(imported)} expenses.")
+                        if flagged:
+                            st.warning(f"⚠️ {flagged} imported expenses look unusual; see Analysis for details.")
+                            anomalies.send_pending_alerts(st.session_state.user_id)
+
+    # --- Categorization Rules ---
+    if st.session_state.user_id:
+        with st.expander("Categorization Rules"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                rule_pattern = st.text_input("Description contains", key="rule_pattern")
+                rule_is_regex = st.checkbox("Regular expression", key="rule_is_regex")
+            with col2:
+                rule_category = st.selectbox("Category", default_categories[:-1], key="rule_category")
+            with col3:
+                rule_priority = st.number_input("Priority", value=0, step=1, key="rule_priority",
+                                                help="Higher priority rules are tried first")
+            if st.button("Add Rule"):
+                error = rules.validate_rule(rule_pattern, rule_is_regex, st.session_state.user_id)
+                if error:
+                    st.error(error)
+                else:
+                    rules.add_rule(st.session_state.user_id, rule_pattern, rule_category,
+                                   is_regex=rule_is_regex, priority=int(rule_priority))
+                    st.success("Rule added.")
+
+            for rule_id, pattern, is_regex, category, priority in rules.get_rules(st.session_state.user_id):
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    kind = "matches" if is_regex else "contains"
+                    st.markdown(f"Description {kind} `{pattern}` → **{category}** (priority {priority})")
+                    rule_error = rules.validate_rule(pattern, is_regex)
+                    if rule_error:
+                        st.caption(f"⚠️ Ignored: {rule_error}")
+                with col2:
+                    if st.button("Delete", key=f"delete_rule_{rule_id}"):
+                        rules.delete_rule(st.session_state.user_id, rule_id)
+                        st.rerun()
+
+            if st.button("Apply Rules to Past Expenses"):
+                changed = rules.apply_rules_to_history(st.session_state.user_id)
+                st.success(f"Recategorized {changed} expenses.")
+
+    # --- Monthly Budgets ---
+    if st.session_state.user_id:
+        with st.expander("Manage Budgets"):
+            col1, col2 = st.columns(2)
+            with col1:
+                budget_category = st.selectbox("Budget Category", default_categories[:-1], key="budget_category")
+            with col2:
+                budget_limit = st.number_input("Monthly Limit (₹)", min_value=0.0, step=500.0, key="budget_limit")
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Save Budget") and budget_limit > 0:
+                    budgets.set_budget(st.session_state.user_id, budget_category, budget_limit)
+                    st.success(f"Budget for {budget_category} saved.")
+            with col2:
+                if st.button("Remove Budget"):
+                    budgets.remove_budget(st.session_state.user_id, budget_category)
+                    st.success(f"Budget for {budget_category} removed.")
+
+        budget_rows = budgets.budget_status(st.session_state.user_id)
+        if budget_rows:
+            st.markdown("### Monthly Budgets")
+            for budget in budget_rows:
+                if budget['remaining'] <= 0:
+                    pace = "over budget"
+                elif budget['days_left'] is None:
+                    pace = "nothing spent yet"
+                else:
+                    pace = f"runs out in ~{budget['days_left']:.0f} days at this pace"
+                st.markdown(f"**{budget['category']}**: ₹{budget['spent']:,.2f} of ₹{budget['limit']:,.2f} "
+                            f"({pace}; projected ₹{budget['projected']:,.2f} this month)")
+                st.progress(min(budget['percent'], 100.0) / 100)
+
     # --- Expense Analysis ---
     if st.session_state.user_id:
-        conn = sqlite3.connect('finance_tracker.db')
-        df_expenses = pd.read_sql_query(
-            """
-            SELECT date, amount, category, description
-            FROM expenses
-            WHERE user_id = ?
-            """,
-            conn,
-            params=(st.session_state.user_id,),
-        )
-        conn.close()
+        df_expenses, buckets = cached_expense_buckets(
+            st.session_state.user_id, expense_version(st.session_state.user_id))
 
         if not df_expenses.empty:
-            df_expenses["date"] = pd.to_datetime(df_expenses["date"])
-
             # --- Day-End Table (Latest Day) ---
             st.markdown("### Latest Day Expenses")
             latest_date = df_expenses["date"].max().strftime("%Y-%m-%d")
@@ -820,18 +1097,17 @@ def expense_tracker():
             current_month = datetime.now().strftime("%Y-%m")
             st.markdown(f"**Month: {current_month}**")
             
-            df_expenses["month"] = df_expenses["date"].dt.strftime("%Y-%m")
-            current_month_expenses = df_expenses[df_expenses["month"] == current_month]
-            
+            by_month_category = buckets["by_month_category"]
             month_table = pd.DataFrame(columns=["Month", "Needs (₹)", "Wants (₹)", "Investments (₹)", "Savings (₹)", "Total (₹)"])
-            if not current_month_expenses.empty:
+            if pd.Period(current_month, "M") in by_month_category.index:
+                month_totals = by_month_category.loc[pd.Period(current_month, "M")].fillna(0)
                 month_row = {
                     "Month": current_month,
-                    "Needs (₹)": current_month_expenses[current_month_expenses["category"] == "Needs"]["amount"].sum(),
-                    "Wants (₹)": current_month_expenses[current_month_expenses["category"] == "Wants"]["amount"].sum(),
-                    "Investments (₹)": current_month_expenses[current_month_expenses["category"] == "Investments"]["amount"].sum(),
-                    "Savings (₹)": current_month_expenses[current_month_expenses["category"] == "Savings"]["amount"].sum(),
-                    "Total (₹)": current_month_expenses["amount"].sum()
+                    "Needs (₹)": month_totals.get("Needs", 0),
+                    "Wants (₹)": month_totals.get("Wants", 0),
+                    "Investments (₹)": month_totals.get("Investments", 0),
+                    "Savings (₹)": month_totals.get("Savings", 0),
+                    "Total (₹)": month_totals.sum()
                 }
                 month_table = pd.concat([month_table, pd.DataFrame([month_row])], ignore_index=True)
             
@@ -857,36 +1133,53 @@ def expense_tracker():
             col1, col2, col3 = st.columns(3)
 
             with col1:
-                total_expenses = df_expenses["amount"].sum()
+                total_expenses = buckets["daily"].sum()
                 st.metric(
                     "Total Expenses",
                     f"{st.session_state.currency} {total_expenses:,.2f}"
                 )
 
             with col2:
-                avg_daily = df_expenses.groupby("date")["amount"].sum().mean()
+                avg_daily = buckets["daily"].mean()
                 st.metric("Average Daily Expense", f"{avg_daily:,.2f}")
 
             with col3:
                 most_common_category = df_expenses["category"].mode()[0]
                 st.metric("Most Common Category", most_common_category)
 
+            # --- Recurring Expenses & Subscriptions ---
+            recurring = cached_recurring_expenses(
+                st.session_state.user_id, expense_version(st.session_state.user_id))
+            active = recurring[recurring["Active"]]
+            if not active.empty:
+                st.markdown("### Recurring Expenses & Subscriptions")
+                subscriptions = active[active["Subscription"]]
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Recurring Cost per Month", f"₹{active['Monthly Cost'].sum():,.2f}")
+                with col2:
+                    st.metric("Subscriptions", f"{len(subscriptions)} (₹{subscriptions['Monthly Cost'].sum():,.2f}/month)")
+                st.dataframe(active.drop(columns=["Active"]).style.format({
+                    "Amount": "{:,.2f}",
+                    "Monthly Cost": "{:,.2f}",
+                    "Last Paid": "{:%Y-%m-%d}",
+                    "Next Expected": "{:%Y-%m-%d}",
+                }))
+
             # --- Visualizations ---
             st.markdown("### Expense Analysis")
 
             # Category-wise Pie Chart
             fig = px.pie(
-                df_expenses,
-                values="amount",
-                names="category",
+                values=buckets["by_category"].values,
+                names=buckets["by_category"].index,
                 title="Expense Distribution by Category"
             )
             st.plotly_chart(fig)
 
             # Daily Expense Trend
-            daily_expenses = (
-                df_expenses.groupby("date")["amount"].sum().reset_index()
-            )
+            daily_expenses = buckets["daily"].reset_index(name="amount")
+            daily_expenses = downsample_frame(daily_expenses, "date", "amount")
 
             fig = px.line(
                 daily_expenses,
@@ -1146,6 +1439,37 @@ def investment_planner():
 
 
 # ============ ADVANCED ANALYTICS ============
+# Portfolio results expire with the market data refresh interval, so they
+# follow price updates as well as ledger changes.
+@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+def cached_portfolio_snapshot(user_id, version):
+    # `version` changes with the ledger, so new transactions invalidate the cache
+    return portfolio_snapshot(user_id)
+
+@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+def cached_portfolio_risk(user_id, version, benchmark_symbol='^NSEI'):
+    snapshot = cached_portfolio_snapshot(user_id, version)
+    if snapshot is None:
+        return None
+    prices = snapshot['adjusted_prices']
+    histories, _, _ = fetch_histories([benchmark_symbol], period=history_period(prices.index[0]))
+    benchmark = None
+    if benchmark_symbol in histories:
+        benchmark = price_matrix(histories, 'Close')[benchmark_symbol]
+        benchmark = benchmark.reindex(benchmark.index.union(prices.index)).ffill()
+    return portfolio_risk(prices, snapshot['values'], benchmark)
+
+@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+def cached_benchmark_comparison(user_id, version):
+    snapshot = cached_portfolio_snapshot(user_id, version)
+    if snapshot is None:
+        return None
+    prices = snapshot['adjusted_prices']
+    histories, _, _ = fetch_histories(list(BENCHMARKS.values()), period=history_period(prices.index[0]))
+    closes = price_matrix(histories, 'Close')
+    benchmark_closes = {name: closes[symbol] for name, symbol in BENCHMARKS.items() if symbol in closes.columns}
+    return benchmark_comparison(prices, snapshot['values'], benchmark_closes)
+
 def advanced_analytics():
     st.markdown("<h1 style='text-align: center;'>Advanced Analytics</h1>", unsafe_allow_html=True)
     
@@ -1154,24 +1478,47 @@ def advanced_analytics():
     with tab1:
         st.markdown("### Expense Pattern Analysis")
         
-        # Get expense data
-        conn = sqlite3.connect('finance_tracker.db')
-        df_expenses = pd.read_sql_query("""
-            SELECT date, amount, category 
-            FROM expenses 
-            WHERE user_id = ?
-        """, conn, params=(st.session_state.user_id,))
-        conn.close()
+        # Filters are pushed down to SQL, so a short range only reads its own rows
+        col1, col2 = st.columns(2)
+        with col1:
+            date_range = st.selectbox("Period", ["Last 30 Days", "Last 90 Days", "Last 12 Months",
+                                                 "All Time", "Custom Range"], index=1)
+        with col2:
+            filter_categories = tuple(st.multiselect("Categories", expense_categories(st.session_state.user_id),
+                                                     placeholder="All categories"))
+        today = pd.Timestamp.today().normalize()
+        filter_start, filter_end = {
+            "Last 30 Days": (today - pd.Timedelta(days=29), None),
+            "Last 90 Days": (today - pd.Timedelta(days=89), None),
+            "Last 12 Months": (today - pd.DateOffset(months=12) + pd.Timedelta(days=1), None),
+            "All Time": (None, None),
+        }.get(date_range, (None, None))
+        if date_range == "Custom Range":
+            custom = st.date_input("Date Range", (today - pd.Timedelta(days=89), today))
+            if len(custom) == 2:
+                filter_start, filter_end = pd.Timestamp(custom[0]), pd.Timestamp(custom[1])
+        
+        # Get expense data, bucketed once per data version and filter
+        df_expenses, buckets = cached_expense_buckets(
+            st.session_state.user_id,
+            expense_version(st.session_state.user_id, filter_start, filter_end, filter_categories),
+            filter_start, filter_end, filter_categories)
         
         if not df_expenses.empty:
-            df_expenses['date'] = pd.to_datetime(df_expenses['date'])
+            # Months without spending in a category stay NaN rather than 0
+            by_month_category = buckets['by_month_category']
             
-            # Monthly Trend
-            monthly_expenses = df_expenses.groupby(df_expenses['date'].dt.strftime('%Y-%m'))[['amount']].sum()
+            # Expense Trend
+            granularity = st.radio("Trend Granularity", ["Monthly", "Weekly", "Daily"], horizontal=True)
+            trend = buckets[granularity.lower()]
+            if granularity == "Monthly":
+                trend = pd.Series(trend.to_numpy(), index=trend.index.strftime('%Y-%m'))
+            else:
+                trend = downsample_series(trend)
             
-            fig = px.line(monthly_expenses, x=monthly_expenses.index, y='amount',
-                         title='Monthly Expense Trend',
-                         labels={'amount': 'Amount (₹)', 'date': 'Month'})
+            fig = px.line(x=trend.index, y=trend.values,
+                         title=f'{granularity} Expense Trend',
+                         labels={'y': 'Amount (₹)', 'x': 'Month' if granularity == "Monthly" else 'Date'})
             st.plotly_chart(fig)
             
             # Category Analysis
@@ -1179,7 +1526,7 @@ def advanced_analytics():
             
             with col1:
                 # Category Distribution
-                category_expenses = df_expenses.groupby('category')['amount'].sum()
+                category_expenses = buckets['by_category']
                 fig = px.pie(values=category_expenses.values,
                            names=category_expenses.index,
                            title='Expense Distribution by Category')
@@ -1187,8 +1534,7 @@ def advanced_analytics():
             
             with col2:
                 # Weekly Pattern
-                df_expenses['weekday'] = df_expenses['date'].dt.day_name()
-                weekly_expenses = df_expenses.groupby('weekday')['amount'].mean()
+                weekly_expenses = buckets['weekday']
                 
                 fig = px.bar(x=weekly_expenses.index,
                            y=weekly_expenses.values,
@@ -1197,7 +1543,7 @@ def advanced_analytics():
                 st.plotly_chart(fig)
             
             # Calculate metrics
-            total_monthly = df_expenses.groupby(df_expenses['date'].dt.strftime('%Y-%m'))['amount'].sum()
+            total_monthly = buckets['monthly']
             avg_monthly = total_monthly.mean()
             std_monthly = total_monthly.std()
             
@@ -1209,86 +1555,217 @@ def advanced_analytics():
             elif total_monthly.iloc[-1] < avg_monthly - std_monthly:
                 insights.append("📉 Your spending this month is lower than usual.")
             
-            # Category-specific insights
-            for category in df_expenses['category'].unique():
-                cat_data = df_expenses[df_expenses['category'] == category]
-                cat_monthly = cat_data.groupby(cat_data['date'].dt.strftime('%Y-%m'))['amount'].sum()
-                
-                if len(cat_monthly) > 1 and cat_monthly.iloc[-1] > cat_monthly.iloc[:-1].mean() * 1.2:
-                    insights.append(f"⚠️ {category} expenses have increased significantly.")
+            # Category-specific insights: each category's latest month with spending
+            # against the mean of its earlier months, for all categories at once
+            active_months = by_month_category.notna().sum()
+            latest = by_month_category.ffill().iloc[-1]
+            trailing_mean = (by_month_category.sum() - latest) / (active_months - 1)
+            rising = (active_months > 1) & (latest > trailing_mean * 1.2)
+            for category in rising.index[rising]:
+                insights.append(f"⚠️ {category} expenses have increased significantly.")
+            
+            # Individual transactions flagged by the unusual-expense detector
+            since = (datetime.now() - pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+            for alert in anomalies.recent_alerts(st.session_state.user_id, since=since):
+                insights.append(f"🔎 Unusual {alert['category']} expense of ₹{alert['amount']:,.2f} "
+                                f"on {alert['date']} (typically ₹{alert['expected']:,.2f}).")
             
             for insight in insights:
                 st.info(insight)
+            
+            # Expense Forecast: seasonal models per category, refitted only when expenses change.
+            # Seasonality needs the full history, so the forecast ignores the filters above.
+            st.markdown(f"### Expense Forecast (Next {HORIZON} Months)")
+            st.caption("Based on your full expense history.")
+            forecast = forecast_user_expenses(st.session_state.user_id)
+            if not forecast['forecast'].empty:
+                history_total = forecast['history'].sum(axis=1)
+                forecast_total = forecast['forecast'].sum(axis=1)
+                
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=history_total.index.strftime('%Y-%m'), y=history_total.values,
+                                         mode='lines', name='Actual'))
+                fig.add_trace(go.Scatter(x=forecast_total.index.strftime('%Y-%m'), y=forecast_total.values,
+                                         mode='lines', name='Forecast', line=dict(dash='dash')))
+                fig.update_layout(title='Monthly Expenses: Actual and Forecast',
+                                  xaxis_title='Month', yaxis_title='Amount (₹)')
+                st.plotly_chart(fig)
+                
+                forecast_table = pd.DataFrame({
+                    'This Month (₹)': forecast['forecast'].iloc[0],
+                    f'Next {HORIZON} Months (₹)': forecast['forecast'].sum(),
+                    'Model': forecast['model'],
+                })
+                st.dataframe(forecast_table.style.format({
+                    'This Month (₹)': '{:,.2f}',
+                    f'Next {HORIZON} Months (₹)': '{:,.2f}',
+                }))
+            else:
+                st.info("The forecast starts once you have a full month of expenses.")
+        else:
+            st.info("No expenses match the selected period and categories.")
     
     with tab2:
         st.markdown("### Investment Performance Analysis")
         
-        # Sample investment data (replace with actual data)
-        investment_data = pd.DataFrame({
-            'Date': pd.date_range(start='2023-01-01', periods=12, freq='ME'),
-            'Equity': np.random.normal(12000, 2000, 12).cumsum(),
-            'Debt': np.random.normal(8000, 1000, 12).cumsum(),
-            'Gold': np.random.normal(5000, 500, 12).cumsum()
-        })
-        
-                # Portfolio Performance
-        fig = px.line(investment_data, x='Date',
-                     y=['Equity', 'Debt', 'Gold'],
-                     title='Portfolio Performance Over Time')
-        st.plotly_chart(fig)
-        
-        # Asset Allocation
-        current_allocation = {
-            'Asset': ['Equity', 'Debt', 'Gold'],
-            'Amount': [investment_data['Equity'].iloc[-1],
-                      investment_data['Debt'].iloc[-1],
-                      investment_data['Gold'].iloc[-1]]
-        }
-        df_allocation = pd.DataFrame(current_allocation)
-        
-        fig = px.pie(df_allocation, values='Amount', names='Asset',
-                    title='Current Asset Allocation')
-        st.plotly_chart(fig)
-        
-        # Performance Metrics
-        st.markdown("### Performance Metrics")
+        # Record buys and sells; holdings are derived from the ledger
+        with st.expander("Record Transaction"):
+            txn_symbol = symbol_picker("Search Symbol (e.g. TCS, Gold BeES, Apple)", "transaction")
+            with st.form("new_transaction"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    txn_date = st.date_input("Trade Date", datetime.now())
+                with col2:
+                    txn_type = st.selectbox("Type", ["BUY", "SELL"])
+                    txn_class = st.selectbox("Asset Class", ASSET_CLASSES)
+                with col3:
+                    txn_quantity = st.number_input("Quantity", min_value=0.0, step=1.0)
+                    txn_price = st.number_input("Price per Unit", min_value=0.0, step=1.0,
+                                                help="In the symbol's trading currency (USD for US listings)")
+                
+                if st.form_submit_button("Add Transaction"):
+                    if txn_symbol and txn_quantity > 0:
+                        try:
+                            add_transaction(st.session_state.user_id, txn_date.strftime("%Y-%m-%d"),
+                                            txn_symbol, txn_class, txn_type, txn_quantity, txn_price)
+                            st.success("Transaction recorded!")
+                        except ValueError as e:
+                            st.error(str(e))
+                    else:
+                        st.error("Enter a symbol and a quantity greater than zero.")
         
-        col1, col2, col3 = st.columns(3)
+        snapshot = cached_portfolio_snapshot(st.session_state.user_id,
+                                             ledger_version(st.session_state.user_id))
         
-        with col1:
-            total_value = df_allocation['Amount'].sum()
-            st.metric("Total Portfolio Value", f"₹{total_value:,.2f}")
+        if snapshot is None:
+            st.info("Record your first transaction to see portfolio performance.")
+        else:
+            current = snapshot['current']
+            by_class = snapshot['by_class']
             
-        with col2:
-            # Safety check to ensure we're only working with numeric data
-            if 'Date' in investment_data.columns:
-                investment_data_numeric = investment_data.drop(columns=['Date'])
-            else:
-                investment_data_numeric = investment_data
+            if snapshot['stale']:
+                st.caption(f"⏱ Using last-known prices for: {', '.join(snapshot['stale'])}")
+            
+            # Portfolio Performance
+            fig = px.line(by_class, x=by_class.index, y=list(by_class.columns),
+                          title='Portfolio Performance Over Time',
+                          labels={'x': 'Date', 'value': 'Value (₹)', 'variable': 'Asset Class'})
+            st.plotly_chart(fig)
+            
+            # Asset Allocation
+            df_allocation = current.groupby('Asset Class')['Value'].sum().reset_index()
+            df_allocation.columns = ['Asset', 'Amount']
+            
+            fig = px.pie(df_allocation, values='Amount', names='Asset',
+                         title='Current Asset Allocation')
+            st.plotly_chart(fig)
+            
+            # Performance Metrics
+            st.markdown("### Performance Metrics")
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                total_value = df_allocation['Amount'].sum()
+                st.metric("Total Portfolio Value", f"₹{total_value:,.2f}")
                 
-            # Get the first row as a Series and filter out non-numeric values
-            first_row = investment_data_numeric.iloc[0]
-            # Instead of select_dtypes, manually filter numeric values
-            numeric_values = [value for value in first_row if isinstance(value, (int, float))]
-            investment_sum = sum(numeric_values) if numeric_values else 0
+            with col2:
+                net_invested = snapshot['net_invested']
+                returns = (total_value - net_invested) / net_invested * 100 if net_invested > 0 else 0
+                st.metric("Total Returns", f"{returns:.1f}%")
             
-            # Calculate returns
-            returns = (total_value - investment_sum) / investment_sum * 100 if investment_sum > 0 else 0
-            st.metric("Total Returns", f"{returns:.1f}%")
-        
-        with col3:
-            monthly_return = returns / 12
-            st.metric("Average Monthly Return", f"{monthly_return:.1f}%")
+            risk_metrics = cached_portfolio_risk(st.session_state.user_id,
+                                                 ledger_version(st.session_state.user_id))
+            
+            with col3:
+                if risk_metrics:
+                    st.metric("Average Monthly Return", f"{risk_metrics['monthly_return'] * 100:.2f}%")
+                else:
+                    st.metric("Average Monthly Return", "—")
+            
+            # Risk Metrics
+            if risk_metrics:
+                st.markdown("### Risk Metrics")
+                col1, col2, col3, col4, col5 = st.columns(5)
+                col1.metric("Volatility (ann.)", f"{risk_metrics['volatility'] * 100:.1f}%")
+                col2.metric("Sharpe Ratio", f"{risk_metrics['sharpe']:.2f}")
+                col3.metric("Sortino Ratio", f"{risk_metrics['sortino']:.2f}")
+                col4.metric("Max Drawdown", f"{risk_metrics['max_drawdown'] * 100:.1f}%")
+                col5.metric("Beta vs NIFTY 50", f"{risk_metrics['beta']:.2f}")
+                
+                if risk_metrics['correlation'] is not None:
+                    fig = px.imshow(risk_metrics['correlation'], text_auto='.2f',
+                                    color_continuous_scale='RdBu_r', zmin=-1, zmax=1,
+                                    title='Holdings Correlation Matrix')
+                    st.plotly_chart(fig)
+            
+            # Time-weighted return against benchmark indices
+            comparison = cached_benchmark_comparison(st.session_state.user_id,
+                                                     ledger_version(st.session_state.user_id))
+            if comparison is not None and not comparison.empty:
+                st.markdown("### Portfolio vs Benchmarks")
+                chart_data = downsample_frame(comparison.rename_axis('Date').reset_index(), 'Date', 'Portfolio')
+                fig = px.line(chart_data, x='Date', y=list(comparison.columns),
+                              title='Time-Weighted Return vs NIFTY 50 and S&P 500',
+                              labels={'value': 'Cumulative Return (%)', 'variable': ''})
+                st.plotly_chart(fig)
+                
+                latest = comparison.ffill().iloc[-1]
+                cols = st.columns(len(latest))
+                for col, (name, value) in zip(cols, latest.items()):
+                    col.metric(name, f"{value:.1f}%",
+                               delta=None if name == 'Portfolio' else f"{latest['Portfolio'] - value:.1f}% vs portfolio")
+            
+            st.markdown("### Holdings")
+            st.dataframe(current.style.format({
+                'Units': '{:,.2f}',
+                'Price': '{:,.2f}',
+                'Value': '{:,.2f}'
+            }))
 
     with tab3:
         st.markdown("### Financial Health Score")
         
+        # Record income; monthly totals are maintained on every income and expense write
+        with st.expander("Record Income"):
+            col1, col2 = st.columns(2)
+            with col1:
+                income_date = st.date_input("Date", datetime.now(), key="income_date")
+                income_amount = st.number_input("Amount (₹)", min_value=0.0, step=1000.0, key="income_amount")
+            with col2:
+                income_source = st.selectbox("Source", cashflow.INCOME_SOURCES, key="income_source")
+                income_description = st.text_input("Description", key="income_description")
+            if st.button("Add Income") and income_amount > 0:
+                cashflow.add_income(st.session_state.user_id, income_date.strftime("%Y-%m-%d"),
+                                    income_amount, income_source, income_description)
+                st.success("Income added successfully!")
+        
+        summary = cashflow.cashflow_summary(st.session_state.user_id)
+        if summary:
+            monthly_cashflow = summary['cashflow'].tail(12)
+            fig = go.Figure()
+            months = monthly_cashflow.index.strftime('%Y-%m')
+            fig.add_trace(go.Bar(x=months, y=monthly_cashflow['income'], name='Income'))
+            fig.add_trace(go.Bar(x=months, y=monthly_cashflow['expenses'], name='Expenses'))
+            fig.add_trace(go.Scatter(x=months, y=monthly_cashflow['net'], name='Net Savings', mode='lines+markers'))
+            fig.update_layout(title='Monthly Cash Flow', barmode='group', yaxis_title='Amount (₹)')
+            st.plotly_chart(fig)
+        
         # Get user inputs
         col1, col2 = st.columns(2)
         
         with col1:
-            monthly_income = st.number_input("Monthly Income (₹)", min_value=0, value=50000)
-            monthly_expenses = st.number_input("Monthly Expenses (₹)", min_value=0, value=30000)
+            if summary:
+                # Averages of recent complete months, read from the precomputed cash flow
+                monthly_income = summary['monthly_income']
+                monthly_expenses = summary['monthly_expenses']
+                st.metric("Average Monthly Income", f"₹{monthly_income:,.2f}")
+                st.metric("Average Monthly Expenses", f"₹{monthly_expenses:,.2f}")
+                st.caption(f"Averaged over {', '.join(summary['months'])}")
+            else:
+                st.caption("Record your income above to have these filled in automatically.")
+                monthly_income = st.number_input("Monthly Income (₹)", min_value=0, value=50000)
+                monthly_expenses = st.number_input("Monthly Expenses (₹)", min_value=0, value=30000)
             emergency_fund = st.number_input("Emergency Fund (₹)", min_value=0, value=100000)
         
         with col2:
@@ -1297,7 +1774,10 @@ def advanced_analytics():
 
         
         # Calculate ratios
-        savings_rate = ((monthly_income - monthly_expenses) / monthly_income) * 100 if monthly_income > 0 else 0
+        if summary:
+            savings_rate = summary['savings_rate']
+        else:
+            savings_rate = ((monthly_income - monthly_expenses) / monthly_income) * 100 if monthly_income > 0 else 0
         emergency_fund_months = emergency_fund / monthly_expenses if monthly_expenses > 0 else 0
         debt_to_income = (total_debt / (monthly_income * 12)) * 100 if monthly_income > 0 else 0
         investment_ratio = (total_investments / (monthly_income * 12)) * 100 if monthly_income > 0 else 0
@@ -1408,7 +1888,9 @@ def settings_page():
     
     # Notification Settings
     st.markdown("### Notification Settings")
-    st.checkbox("Email Alerts for Unusual Expenses", value=True)
+    email_alerts = anomalies.alerts_enabled(st.session_state.user_id)
+    if st.checkbox("Email Alerts for Unusual Expenses", value=email_alerts) != email_alerts:
+        anomalies.set_alerts_enabled(st.session_state.user_id, not email_alerts)
     st.checkbox("Monthly Report", value=True)
     st.checkbox("Investment Alerts", value=True)
     
@@ -1449,6 +1931,16 @@ def settings_page():
                          (st.session_state.user_id,))
                 c.execute("DELETE FROM goals WHERE user_id = ?", 
                          (st.session_state.user_id,))
+                c.execute("DELETE FROM transactions WHERE user_id = ?", 
+                         (st.session_state.user_id,))
+                c.execute("DELETE FROM watchlists WHERE user_id = ?", 
+                         (st.session_state.user_id,))
+                c.execute("DELETE FROM user_activity WHERE user_id = ?", 
+                         (st.session_state.user_id,))
+                for table in ("expense_stats", "expense_alerts", "user_settings", "budgets", "budget_spend",
+                              "expense_revisions", "categorization_rules", "income", "monthly_cashflow"):
+                    c.execute(f"DELETE FROM {table} WHERE user_id = ?", 
+                             (st.session_state.user_id,))
                 c.execute("DELETE FROM users WHERE id = ?", 
                          (st.session_state.user_id,))
                 conn.commit()
@@ -1459,6 +1951,16 @@ def settings_page():
                 st.success("Account deleted successfully!")
                 st.rerun()
 
+def budget_alerts():
+    """Banner for budgets that are exceeded or will run out before month end."""
+    for budget in budgets.budget_status(st.session_state.user_id):
+        if budget['remaining'] <= 0:
+            st.error(f"🚨 {budget['category']} budget exceeded: ₹{budget['spent']:,.2f} "
+                     f"of ₹{budget['limit']:,.2f} spent this month.")
+        elif budget['days_left'] is not None and budget['days_left'] < budget['days_remaining_in_month']:
+            st.warning(f"⚠️ {budget['category']} budget will run out in about "
+                       f"{budget['days_left']:.0f} days at this month's pace.")
+
 # ============ MAIN APP ============
 def main():
     # Apply theme
@@ -1481,6 +1983,7 @@ def main():
         auth_page()
     else:
         selected = create_navigation()
+        budget_alerts()
         
         if selected == "Dashboard":
             dashboard()
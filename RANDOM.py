@@ -5,8 +5,7 @@ from reportlab.lib import colors
 import io
 import os
 import pandas as pd
-import numpy as np
-from sklearn.linear_model import LinearRegression
+from forecasting import forecast_user_expenses, HORIZON
 import nltk
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
@@ -31,6 +30,7 @@ def generate_ai_report():
     elements.append(Spacer(1, 12))
 
     # Expenses Section
+    future_expenses = pd.Series(dtype=float)  # stays empty without a full month of expenses to forecast from
     df_expenses = pd.read_sql_query("SELECT * FROM expenses WHERE user_id = ?", conn, params=(st.session_state.user_id,))
     if not df_expenses.empty:
         total_exp = df_expenses["amount"].sum()
@@ -42,13 +42,15 @@ def generate_ai_report():
         elements.append(Image("exp_pie.png", width=200, height=200))
         elements.append(Spacer(1, 12))
 
-        # ML Prediction for Future Expenses
-        X = np.array(range(len(df_expenses))).reshape(-1, 1)
-        y = df_expenses["amount"].values
-        model = LinearRegression().fit(X, y)
-        future_months = 12
-        future_expenses = model.predict(np.array(range(len(df_expenses), len(df_expenses) + future_months)).reshape(-1, 1))
-        elements.append(Paragraph(f"Predicted Expenses Next {future_months} Months: ₹{sum(future_expenses):,.2f}", styles['Normal']))
+        # Seasonal forecast of monthly spending per category (cached until expenses change)
+        forecast = forecast_user_expenses(st.session_state.user_id)['forecast']
+        if not forecast.empty:
+            future_expenses = forecast.sum(axis=1)
+            elements.append(Paragraph(f"Predicted Expenses Next {HORIZON} Months: ₹{future_expenses.sum():,.2f}", styles['Normal']))
+            forecast_table = [["Category", "This Month", f"Next {HORIZON} Months"]] + [
+                [category, f"₹{forecast[category].iloc[0]:,.2f}", f"₹{forecast[category].sum():,.2f}"]
+                for category in forecast.columns]
+            elements.append(Table(forecast_table, colWidths=[120, 100, 100]))
 
     # Investments Section
     df_goals = pd.read_sql_query("SELECT * FROM goals WHERE user_id = ?", conn, params=(st.session_state.user_id,))
@@ -68,12 +70,15 @@ def generate_ai_report():
         elements.append(Spacer(1, 12))
 
     # Graphs and Visualizations
-    plt.figure(figsize=(6, 4))
-    plt.plot(future_expenses)
-    plt.title("Predicted Expense Trend")
-    plt.savefig("exp_trend.png")
-    elements.append(Image("exp_trend.png", width=200, height=200))
-    plt.close()
+    if not future_expenses.empty:
+        plt.figure(figsize=(6, 4))
+        plt.plot(future_expenses.index.strftime('%Y-%m'), future_expenses.values)
+        plt.xticks(rotation=45)
+        plt.title("Predicted Monthly Expenses")
+        plt.tight_layout()
+        plt.savefig("exp_trend.png")
+        elements.append(Image("exp_trend.png", width=200, height=200))
+        plt.close()
 
     # AI Analysis with NLP
     sia = SentimentIntensityAnalyzer()
@@ -15,35 +15,32 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Imag
 from reportlab.lib.styles import getSampleStyleSheet
 import io
 import os
-import requests
+import fx
 
 # Currency symbols
 currency_symbols = {
     "INR": "₹", "USD": "$", "AED": "د.إ", "SAR": "ر.س", "CAD": "$", "QAR": "ر.ق", "CNY": "¥"
 }
 
-# Fetch exchange rates
-if 'exchange_rates' not in st.session_state:
-    try:
-        response = requests.get("https://api.exchangerate-api.com/v4/latest/INR")
-        data = response.json()
-        st.session_state.exchange_rates = data['rates']
-    except:
-        st.warning("Failed to fetch exchange rates. Using fallback rates.")
-        st.session_state.exchange_rates = {"USD": 0.012, "AED": 0.044, "INR": 1.0}
-
 def convert_amount(amount, from_currency="INR", to_currency=None):
+    # Works on scalars and whole Series; rates come from the shared fx cache
     if to_currency is None:
         to_currency = st.session_state.currency
-    if from_currency == to_currency:
-        return amount
-    if from_currency == "INR" and to_currency in st.session_state.exchange_rates:
-        rate = st.session_state.exchange_rates[to_currency]
-        return amount * rate
-    else:
+    try:
+        return fx.convert(amount, to_currency, from_currency)
+    except KeyError:
         st.error(f"Unable to fetch exchange rate from {from_currency} to {to_currency}")
         return amount
 
+def convert_amounts_as_of(amounts, dates, from_currency="INR", to_currency=None):
+    # Historical amounts are converted at the rate on their own date
+    if to_currency is None:
+        to_currency = st.session_state.currency
+    if fx.get_rate(from_currency, to_currency) is None:
+        st.error(f"Unable to fetch exchange rate from {from_currency} to {to_currency}")
+        return amounts
+    return fx.convert_as_of(amounts, dates, to_currency, from_currency)
+
 # Page config
 st.set_page_config(
     page_title="AI Financial Planner",
@@ -328,6 +325,7 @@ def init_db():
     c.execute('''CREATE TABLE IF NOT EXISTS goals
                  (id INTEGER PRIMARY KEY, user_id INTEGER, name TEXT, target_amount REAL, current_amount REAL, 
                   target_date TEXT, priority TEXT)''')
+    fx.create_tables(c)
     conn.commit()
     conn.close()
 
@@ -580,12 +578,13 @@ def expense_tracker():
         if not df_expenses.empty:
             st.markdown("### Expense Summary")
             col1, col2, col3 = st.columns(3)
+            df_expenses["amount_converted"] = convert_amounts_as_of(df_expenses["amount"], df_expenses["date"])
             with col1:
-                total_expenses = df_expenses["amount"].sum()
-                st.metric("Total Expenses", f"{currency_symbols[st.session_state.currency]} {convert_amount(total_expenses):,.2f}")
+                total_expenses = df_expenses["amount_converted"].sum()
+                st.metric("Total Expenses", f"{currency_symbols[st.session_state.currency]} {total_expenses:,.2f}")
             with col2:
-                avg_daily = df_expenses.groupby("date")["amount"].sum().mean()
-                st.metric("Average Daily", f"{currency_symbols[st.session_state.currency]} {convert_amount(avg_daily):,.2f}")
+                avg_daily = df_expenses.groupby("date")["amount_converted"].sum().mean()
+                st.metric("Average Daily", f"{currency_symbols[st.session_state.currency]} {avg_daily:,.2f}")
             with col3:
                 most_common = df_expenses["category"].mode()[0]
                 st.metric("Top Category", most_common)
@@ -594,8 +593,7 @@ def expense_tracker():
             fig = px.pie(df_expenses, values="amount", names="category", title="Expense Distribution")
             st.plotly_chart(fig)
             df_expenses["date"] = pd.to_datetime(df_expenses["date"])
-            daily_expenses = df_expenses.groupby("date")["amount"].sum().reset_index()
-            daily_expenses["amount_converted"] = daily_expenses["amount"].apply(convert_amount)
+            daily_expenses = df_expenses.groupby("date")["amount_converted"].sum().reset_index()
             fig = px.line(daily_expenses, x="date", y="amount_converted", title="Daily Expense Trend", labels={"amount_converted": f"Amount ({currency_symbols[st.session_state.currency]})"})
             st.plotly_chart(fig)
         else:
@@ -820,6 +818,15 @@ def settings_page():
     st.checkbox("Email Alerts for Unusual Expenses", value=True)
     st.checkbox("Monthly Report", value=True)
     
+    st.markdown("### Exchange Rates")
+    if st.button("Load Historical Exchange Rates"):
+        with st.spinner("Loading 5 years of daily rates..."):
+            rows, failed = fx.backfill_history([code for code in currency_symbols if code != "INR"])
+        if rows:
+            st.success(f"Stored {rows:,} daily rates. Past expenses now convert at their own date's rate.")
+        if failed:
+            st.warning(f"Could not load rates for: {', '.join(failed)}. Those currencies use today's rate.")
+    
     st.markdown("### Data Management")
     col1, col2 = st.columns(2)
     with col1:
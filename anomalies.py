@@ -0,0 +1,236 @@
+import os
+import math
+import sqlite3
+import smtplib
+from email.message import EmailMessage
+
+# ============ UNUSUAL EXPENSE DETECTOR ============
+# One running state row per (user, category), updated in O(1) as each expense
+# is inserted. Amounts are compared on a log scale (spending is right-skewed)
+# against an exponentially weighted mean and mean absolute deviation. Updates
+# are clipped to a few deviations, so one huge purchase flags itself without
+# dragging the baseline up for the expenses that follow.
+
+DB_PATH = 'finance_tracker.db'
+
+ALPHA = 0.1            # EWMA weight of the newest expense (roughly the last 20 count)
+Z_THRESHOLD = 3.5      # robust z-score above which an expense is unusual
+MIN_OBSERVATIONS = 5   # no alerts until a category has this much history
+CLIP = 3.0             # updates are clipped to this many deviations
+MAD_TO_STD = math.sqrt(math.pi / 2)  # mean absolute deviation -> std for a normal
+MIN_DEVIATION = 0.05   # floor so identical repeated amounts do not give infinite scores
+
+
+def create_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS expense_stats
+                 (user_id INTEGER,
+                  category TEXT,
+                  count INTEGER,
+                  mean REAL,
+                  deviation REAL,
+                  PRIMARY KEY (user_id, category))''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS expense_alerts
+                 (id INTEGER PRIMARY KEY,
+                  user_id INTEGER,
+                  expense_id INTEGER,
+                  date TEXT,
+                  category TEXT,
+                  amount REAL,
+                  expected REAL,
+                  score REAL,
+                  notified INTEGER DEFAULT 0,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS user_settings
+                 (user_id INTEGER PRIMARY KEY,
+                  unusual_expense_alerts INTEGER DEFAULT 1)''')
+
+
+def _update(count, mean, deviation, x):
+    """One EWMA step on a log amount; returns the new (count, mean, deviation)."""
+    if count == 0:
+        return 1, x, 0.0
+    scale = max(deviation * MAD_TO_STD, MIN_DEVIATION)
+    clipped = min(max(x, mean - CLIP * scale), mean + CLIP * scale)
+    mean = (1 - ALPHA) * mean + ALPHA * clipped
+    # Early observations get a larger weight so the deviation warms up quickly
+    weight = max(ALPHA, 1.0 / (count + 1))
+    deviation = (1 - weight) * deviation + weight * abs(clipped - mean)
+    return count + 1, mean, deviation
+
+
+def _score(count, mean, deviation, x):
+    if count < MIN_OBSERVATIONS:
+        return 0.0
+    return (x - mean) / max(deviation * MAD_TO_STD, MIN_DEVIATION)
+
+
+def _load_state(c, user_id, category, before_id):
+    c.execute("SELECT count, mean, deviation FROM expense_stats WHERE user_id = ? AND category = ?",
+              (user_id, category))
+    row = c.fetchone()
+    if row is not None:
+        return row
+    # First expense seen for this category since the detector was added:
+    # replay the existing history once to seed the state
+    c.execute("""
+        SELECT amount FROM expenses
+        WHERE user_id = ? AND category = ? AND id < ? AND amount > 0
+        ORDER BY date, id
+    """, (user_id, category, before_id))
+    state = (0, 0.0, 0.0)
+    for (amount,) in c.fetchall():
+        state = _update(*state, math.log(amount))
+    return state
+
+
+def observe_expense(conn, user_id, expense_id, date, category, amount):
+    """
+    Score a newly inserted expense against its category's history and fold it
+    into the running state. Returns the alert dict when the expense is
+    unusual, otherwise None. The caller commits.
+    """
+    if amount is None or amount <= 0:
+        return None
+    c = conn.cursor()
+    count, mean, deviation = _load_state(c, user_id, category, expense_id)
+    x = math.log(amount)
+    score = _score(count, mean, deviation, x)
+
+    count, new_mean, deviation = _update(count, mean, deviation, x)
+    c.execute("""
+        INSERT INTO expense_stats (user_id, category, count, mean, deviation)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, category) DO UPDATE SET
+            count = excluded.count, mean = excluded.mean, deviation = excluded.deviation
+    """, (user_id, category, count, new_mean, deviation))
+
+    if score <= Z_THRESHOLD:
+        return None
+    alert = {
+        'user_id': user_id,
+        'expense_id': expense_id,
+        'date': date,
+        'category': category,
+        'amount': amount,
+        'expected': math.exp(mean),
+        'score': score,
+    }
+    c.execute("""
+        INSERT INTO expense_alerts (user_id, expense_id, date, category, amount, expected, score)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (user_id, expense_id, date, category, amount, alert['expected'], score))
+    alert['id'] = c.lastrowid
+    return alert
+
+
+def reset_category(conn, user_id, category):
+    """Forget a category's baseline after its history changed; it reseeds on the next insert."""
+    conn.execute("DELETE FROM expense_stats WHERE user_id = ? AND category = ?", (user_id, category))
+
+
+def recent_alerts(user_id, since=None):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    query = "SELECT date, category, amount, expected, score FROM expense_alerts WHERE user_id = ?"
+    params = [user_id]
+    if since is not None:
+        query += " AND date >= ?"
+        params.append(since)
+    c.execute(query + " ORDER BY date DESC, id DESC", params)
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(['date', 'category', 'amount', 'expected', 'score'], row)) for row in rows]
+
+
+# ============ ALERT SETTINGS & EMAIL ============
+# Alerts are always recorded and shown in the app; they are also emailed when
+# the user has the setting on and SMTP is configured. Unsent alerts stay
+# queued (notified = 0) and go out with the next send.
+
+SMTP_HOST = os.getenv('SMTP_HOST')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_USER = os.getenv('SMTP_USER')
+SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+ALERT_SENDER = os.getenv('ALERT_SENDER', SMTP_USER or 'alerts@localhost')
+
+
+def alerts_enabled(user_id):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT unusual_expense_alerts FROM user_settings WHERE user_id = ?", (user_id,))
+    row = c.fetchone()
+    conn.close()
+    return bool(row[0]) if row else True
+
+
+def set_alerts_enabled(user_id, enabled):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO user_settings (user_id, unusual_expense_alerts) VALUES (?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET unusual_expense_alerts = excluded.unusual_expense_alerts
+    """, (user_id, int(enabled)))
+    conn.commit()
+    conn.close()
+
+
+def _alert_body(alerts, currency):
+    lines = ["The following expenses look unusual compared with your history:", ""]
+    for alert in alerts:
+        lines.append(f"- {alert['date']}  {alert['category']}: {currency}{alert['amount']:,.2f} "
+                     f"(typically around {currency}{alert['expected']:,.2f})")
+    lines += ["", "You can turn these alerts off under Settings > Notification Settings."]
+    return "\n".join(lines)
+
+
+def send_pending_alerts(user_id, currency='₹'):
+    """
+    Email the user's unsent alerts when enabled and SMTP is configured.
+    Returns the number of alerts sent.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    if not alerts_enabled(user_id):
+        # Alerts raised while the setting was off are not sent later,
+        # even once SMTP is configured
+        c.execute("UPDATE expense_alerts SET notified = 1 WHERE user_id = ? AND notified = 0", (user_id,))
+        conn.commit()
+        conn.close()
+        return 0
+    if not SMTP_HOST:
+        conn.close()
+        return 0
+    c.execute("SELECT email FROM users WHERE id = ?", (user_id,))
+    row = c.fetchone()
+    c.execute("""
+        SELECT id, date, category, amount, expected FROM expense_alerts
+        WHERE user_id = ? AND notified = 0 ORDER BY date, id
+    """, (user_id,))
+    pending = [dict(zip(['id', 'date', 'category', 'amount', 'expected'], r)) for r in c.fetchall()]
+    if row is None or not pending:
+        conn.close()
+        return 0
+
+    message = EmailMessage()
+    message['Subject'] = f"Unusual expense alert ({len(pending)})"
+    message['From'] = ALERT_SENDER
+    message['To'] = row[0]
+    message.set_content(_alert_body(pending, currency))
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as server:
+            server.starttls()
+            if SMTP_USER:
+                server.login(SMTP_USER, SMTP_PASSWORD)
+            server.send_message(message)
+    except (smtplib.SMTPException, OSError):
+        # Left queued; the next insert retries
+        conn.close()
+        return 0
+
+    c.executemany("UPDATE expense_alerts SET notified = 1 WHERE id = ?",
+                  [(alert['id'],) for alert in pending])
+    conn.commit()
+    conn.close()
+    return len(pending)
@@ -0,0 +1,189 @@
+"""
+Bulk historical backfill of daily prices into the local price store.
+
+Fetches years of history for every watched and held symbol (plus the
+benchmark indices) with a bounded worker pool and a shared rate limit.
+Progress is checkpointed after each symbol, so an interrupted run resumes
+where it stopped. Replay (synthetic or recorded) prices go to a separate
+database unless --db says otherwise, so they never mix with real history.
+
+    python backfill.py --period 10y --workers 4 --rate 2
+    python backfill.py --provider replay --symbols TCS.NS AAPL --restart
+"""
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import price_store
+from market_data import YFinanceProvider, ReplayProvider, PERIOD_DAYS
+from risk import BENCHMARKS
+
+DB_PATH = 'finance_tracker.db'
+REPLAY_DB_PATH = 'backfill_replay.db'
+CHECKPOINT_FILE = 'backfill_checkpoint.json'
+
+
+class RateLimiter:
+    """Token bucket shared by all workers: at most `rate` requests per second."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def watched_symbols():
+    """Every symbol in any watchlist or ledger, plus the benchmark indices."""
+    symbols = set(BENCHMARKS.values())
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    for query in ("SELECT DISTINCT symbol FROM watchlists", "SELECT DISTINCT symbol FROM transactions"):
+        try:
+            c.execute(query)
+            symbols.update(row[0] for row in c.fetchall())
+        except sqlite3.OperationalError:
+            # Table not created yet
+            pass
+    conn.close()
+    return sorted(symbols)
+
+
+def load_checkpoint(path):
+    """Completed symbols keyed by checkpoint_key(): {"yfinance|5y|finance_tracker.db": ["AAPL", ...], ...}."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def checkpoint_key(provider, period, db):
+    """Progress is only shared between runs with the same source, period and target database."""
+    source = provider.name
+    fixtures_dir = getattr(provider, 'fixtures_dir', None)
+    if fixtures_dir:
+        source += f":{os.path.abspath(fixtures_dir)}"
+    return f"{source}|{period}|{os.path.abspath(db)}"
+
+
+def save_checkpoint(path, state):
+    # Write-then-rename so a kill mid-write never leaves a corrupt checkpoint
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def run_backfill(symbols, provider, period='5y', workers=4, rate=2.0,
+                 checkpoint=CHECKPOINT_FILE, restart=False, db=DB_PATH, log=print):
+    """
+    Backfill `symbols` into the price store in `db`. Returns a report dict
+    with counts, elapsed seconds and throughput.
+    """
+    conn = sqlite3.connect(db)
+    price_store.create_tables(conn.cursor())
+    conn.commit()
+    conn.close()
+
+    state = load_checkpoint(checkpoint)
+    key = checkpoint_key(provider, period, db)
+    done = set() if restart else set(state.get(key, []))
+    pending = [symbol for symbol in symbols if symbol not in done]
+    log(f"Backfilling {len(pending)} symbols into {db} ({len(symbols) - len(pending)} already done), "
+        f"period={period}, workers={workers}, rate={rate}/s")
+
+    limiter = RateLimiter(rate, burst=workers)
+    write_lock = threading.Lock()
+    report = {'symbols': 0, 'rows': 0, 'failed': [], 'skipped': len(symbols) - len(pending)}
+
+    def backfill_one(symbol):
+        limiter.acquire()
+        hist = provider.history(symbol, period)
+        if hist is None or hist.empty:
+            # yfinance reports most failures (bad symbol, throttling) as an empty frame
+            raise ValueError("no data returned")
+        # SQLite allows one writer at a time; serialize stores to avoid lock timeouts
+        with write_lock:
+            conn = sqlite3.connect(db)
+            try:
+                price_store.save_history(symbol, hist, conn)
+            finally:
+                conn.close()
+        return len(hist)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(backfill_one, symbol): symbol for symbol in pending}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                report['failed'].append(symbol)
+                log(f"  {symbol}: failed ({e})")
+                continue
+            report['symbols'] += 1
+            report['rows'] += rows
+            done.add(symbol)
+            state[key] = sorted(done)
+            save_checkpoint(checkpoint, state)
+            log(f"  {symbol}: {rows} rows")
+
+    elapsed = time.monotonic() - start
+    report['elapsed'] = elapsed
+    report['symbols_per_sec'] = report['symbols'] / elapsed if elapsed > 0 else 0.0
+    report['rows_per_sec'] = report['rows'] / elapsed if elapsed > 0 else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill daily price history into the local store.")
+    parser.add_argument('--symbols', nargs='*', help="Symbols to backfill (default: all watched and held symbols)")
+    parser.add_argument('--period', default='5y', choices=list(PERIOD_DAYS.keys()))
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent fetches")
+    parser.add_argument('--rate', type=float, default=2.0, help="Max requests per second (0 = unlimited)")
+    parser.add_argument('--provider', default=os.getenv('MARKET_DATA_PROVIDER', 'yfinance'),
+                        choices=['yfinance', 'replay'])
+    parser.add_argument('--fixtures', default=os.getenv('MARKET_DATA_FIXTURES'),
+                        help="Fixture directory for the replay provider")
+    parser.add_argument('--db', help=f"Price store database (default: {DB_PATH}, "
+                                     f"or {REPLAY_DB_PATH} for the replay provider)")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE)
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    provider = ReplayProvider(fixtures_dir=args.fixtures) if args.provider == 'replay' else YFinanceProvider()
+    db = args.db or (REPLAY_DB_PATH if args.provider == 'replay' else DB_PATH)
+    symbols = args.symbols or watched_symbols()
+    report = run_backfill(symbols, provider, period=args.period, workers=args.workers,
+                          rate=args.rate, checkpoint=args.checkpoint, restart=args.restart, db=db)
+
+    print(f"Done: {report['symbols']} symbols, {report['rows']:,} rows in {report['elapsed']:.1f}s "
+          f"({report['symbols_per_sec']:.2f} symbols/s, {report['rows_per_sec']:,.0f} rows/s), "
+          f"{report['skipped']} skipped, {len(report['failed'])} failed")
+    if report['failed']:
+        print("Failed: " + ", ".join(sorted(report['failed'])))
+        print("Re-run the same command to retry them.")
+
+
+if __name__ == "__main__":
+    main()
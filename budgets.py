@@ -0,0 +1,113 @@
+import sqlite3
+import calendar
+from datetime import date as date_type, datetime
+
+# ============ CATEGORY BUDGETS ============
+# Monthly spend per (user, category, month) is kept as a running counter that
+# every expense write increments, so budget checks read one row per budgeted
+# category instead of summing the expense history.
+
+DB_PATH = 'finance_tracker.db'
+
+
+def create_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS budgets
+                 (user_id INTEGER,
+                  category TEXT,
+                  monthly_limit REAL,
+                  PRIMARY KEY (user_id, category))''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS budget_spend
+                 (user_id INTEGER,
+                  category TEXT,
+                  month TEXT,
+                  spent REAL,
+                  PRIMARY KEY (user_id, category, month))''')
+
+
+def record_spend(conn, user_id, category, date, amount):
+    """Add an expense to its month's counter. The caller commits."""
+    conn.execute("""
+        INSERT INTO budget_spend (user_id, category, month, spent) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, category, month) DO UPDATE SET spent = spent + excluded.spent
+    """, (user_id, category, str(date)[:7], amount))
+
+
+def rebuild_spend(conn, user_id, category):
+    """Recount a category's monthly counters from the expenses table."""
+    conn.execute("DELETE FROM budget_spend WHERE user_id = ? AND category = ?", (user_id, category))
+    conn.execute("""
+        INSERT INTO budget_spend (user_id, category, month, spent)
+        SELECT user_id, category, substr(date, 1, 7), SUM(amount)
+        FROM expenses WHERE user_id = ? AND category = ?
+        GROUP BY substr(date, 1, 7)
+    """, (user_id, category))
+
+
+def set_budget(user_id, category, monthly_limit):
+    """
+    Create or change a category budget. Counters are recounted once here,
+    so spending recorded before the budget existed is included.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("""
+        INSERT INTO budgets (user_id, category, monthly_limit) VALUES (?, ?, ?)
+        ON CONFLICT(user_id, category) DO UPDATE SET monthly_limit = excluded.monthly_limit
+    """, (user_id, category, monthly_limit))
+    rebuild_spend(conn, user_id, category)
+    conn.commit()
+    conn.close()
+
+
+def remove_budget(user_id, category):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM budgets WHERE user_id = ? AND category = ?", (user_id, category))
+    conn.commit()
+    conn.close()
+
+
+def budget_status(user_id, today=None):
+    """
+    Current-month status of every budget: limit, spent, remaining, percent
+    used, projected month-end spend and days until the budget runs out at
+    this month's pace (None when nothing has been spent yet).
+    """
+    today = today or date_type.today()
+    if isinstance(today, datetime):
+        today = today.date()
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        SELECT b.category, b.monthly_limit, COALESCE(s.spent, 0)
+        FROM budgets b
+        LEFT JOIN budget_spend s
+          ON s.user_id = b.user_id AND s.category = b.category AND s.month = ?
+        WHERE b.user_id = ?
+        ORDER BY b.category
+    """, (today.strftime('%Y-%m'), user_id))
+    rows = c.fetchall()
+    conn.close()
+
+    status = []
+    for category, limit, spent in rows:
+        daily_rate = spent / today.day
+        remaining = limit - spent
+        if remaining <= 0:
+            days_left = 0.0
+        elif daily_rate > 0:
+            days_left = remaining / daily_rate
+        else:
+            days_left = None
+        status.append({
+            'category': category,
+            'limit': limit,
+            'spent': spent,
+            'remaining': remaining,
+            'percent': spent / limit * 100 if limit > 0 else 0.0,
+            'projected': daily_rate * days_in_month,
+            'days_left': days_left,
+            'days_remaining_in_month': days_in_month - today.day,
+        })
+    return status
@@ -0,0 +1,122 @@
+import sqlite3
+import pandas as pd
+
+# ============ INCOME & MONTHLY CASH FLOW ============
+# Monthly income and expense totals per user are kept in monthly_cashflow and
+# incremented by every income or expense write, so savings rate and the other
+# Financial Health ratios read a handful of precomputed rows.
+
+DB_PATH = 'finance_tracker.db'
+
+INCOME_SOURCES = ["Salary", "Business", "Freelance", "Rental", "Interest & Dividends", "Other"]
+TRAILING_MONTHS = 3  # complete months averaged for the Financial Health ratios
+
+
+def create_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS income
+                 (id INTEGER PRIMARY KEY,
+                  user_id INTEGER,
+                  date TEXT,
+                  amount REAL,
+                  source TEXT,
+                  description TEXT)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_income_user_date ON income (user_id, date)")
+
+    c.execute('''CREATE TABLE IF NOT EXISTS monthly_cashflow
+                 (user_id INTEGER,
+                  month TEXT,
+                  income REAL DEFAULT 0,
+                  expenses REAL DEFAULT 0,
+                  PRIMARY KEY (user_id, month))''')
+
+
+def rebuild_cashflow(conn, user_id):
+    """Recount a user's monthly totals from the income and expenses tables."""
+    conn.execute("DELETE FROM monthly_cashflow WHERE user_id = ?", (user_id,))
+    conn.execute("""
+        INSERT INTO monthly_cashflow (user_id, month, income, expenses)
+        SELECT ?, month, SUM(income), SUM(expenses) FROM (
+            SELECT substr(date, 1, 7) AS month, amount AS income, 0 AS expenses
+            FROM income WHERE user_id = ?
+            UNION ALL
+            SELECT substr(date, 1, 7), 0, amount
+            FROM expenses WHERE user_id = ?
+        ) GROUP BY month
+    """, (user_id, user_id, user_id))
+
+
+def record_cashflow(conn, user_id, date, income=0.0, expenses=0.0):
+    """
+    Add an already inserted income or expense row to its month's totals.
+    The caller commits.
+    """
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM monthly_cashflow WHERE user_id = ? LIMIT 1", (user_id,))
+    if c.fetchone() is None:
+        # First write since cash flow tracking started: count the existing
+        # history (which already includes this row) once
+        rebuild_cashflow(conn, user_id)
+        return
+    c.execute("""
+        INSERT INTO monthly_cashflow (user_id, month, income, expenses) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, month) DO UPDATE SET
+            income = income + excluded.income, expenses = expenses + excluded.expenses
+    """, (user_id, str(date)[:7], income, expenses))
+
+
+def add_income(user_id, date, amount, source, description=''):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("""
+        INSERT INTO income (user_id, date, amount, source, description)
+        VALUES (?, ?, ?, ?, ?)
+    """, (user_id, date, amount, source, description))
+    record_cashflow(conn, user_id, date, income=amount)
+    conn.commit()
+    conn.close()
+
+
+def load_cashflow(user_id):
+    """Monthly income, expenses, net savings and savings rate, indexed by month (PeriodIndex)."""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT 1 FROM monthly_cashflow WHERE user_id = ? LIMIT 1", (user_id,))
+    if c.fetchone() is None:
+        rebuild_cashflow(conn, user_id)
+        conn.commit()
+    df = pd.read_sql_query("""
+        SELECT month, income, expenses FROM monthly_cashflow
+        WHERE user_id = ? ORDER BY month
+    """, conn, params=(user_id,))
+    conn.close()
+    df.index = pd.PeriodIndex(df.pop('month'), freq='M')
+    df['net'] = df['income'] - df['expenses']
+    df['savings_rate'] = (df['net'] / df['income'].where(df['income'] > 0)) * 100
+    return df
+
+
+def cashflow_summary(user_id, today=None):
+    """
+    Average monthly income and expenses over the last TRAILING_MONTHS
+    complete months since income was first recorded (the current month when
+    there are none yet), and the savings rate they imply. Returns None
+    without any recorded income.
+    """
+    cashflow = load_cashflow(user_id)
+    if cashflow.empty or cashflow['income'].sum() <= 0:
+        return None
+    current = pd.Period(pd.Timestamp(today or pd.Timestamp.today()), freq='M')
+    # Months before income tracking started would count as zero income
+    first_income = cashflow.index[cashflow['income'] > 0].min()
+    months = pd.period_range(max(current - TRAILING_MONTHS, first_income), current - 1, freq='M')
+    window = cashflow.reindex(months).fillna(0.0)
+    if window['income'].sum() <= 0:
+        window = cashflow.loc[[current]] if current in cashflow.index else cashflow.iloc[-1:]
+    income = window['income'].mean()
+    expenses = window['expenses'].mean()
+    return {
+        'monthly_income': income,
+        'monthly_expenses': expenses,
+        'savings_rate': (income - expenses) / income * 100 if income > 0 else 0.0,
+        'months': [str(month) for month in window.index],
+        'cashflow': cashflow,
+    }
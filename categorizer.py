@@ -0,0 +1,180 @@
+import time
+import zlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from expenses import load_expenses, expense_version
+from recurring import normalize_description
+
+# ============ EXPENSE AUTO-CATEGORIZATION ============
+# A per-user multinomial naive Bayes over hashed word and character n-grams
+# of the description: a linear model whose weights are log feature
+# frequencies, so training is one counting pass over the history and a
+# prediction sums a few dozen weight rows. Models are cached per user until
+# the expenses change.
+
+N_FEATURES = 2 ** 15
+CHAR_NGRAMS = (3, 4, 5)
+SMOOTHING = 0.1
+MIN_TRAINING_ROWS = 10
+MIN_CONFIDENCE = 0.5
+MIN_KNOWN_FRACTION = 0.3  # share of a description's features that must have been seen in training
+CACHE_SIZE = 64
+
+_models = OrderedDict()  # user_id -> (version, model)
+_models_lock = threading.Lock()
+
+
+def features(text):
+    """Hashed feature indices of a description: its words and character n-grams."""
+    text = normalize_description(text)
+    if not text:
+        return []
+    tokens = text.split()
+    padded = f" {text} "
+    for n in CHAR_NGRAMS:
+        tokens += [padded[i:i + n] for i in range(len(padded) - n + 1)]
+    return [zlib.crc32(token.encode()) % N_FEATURES for token in tokens]
+
+
+class CategoryModel:
+    def __init__(self, categories, weights, prior, known):
+        self.categories = categories
+        self.weights = weights  # (N_FEATURES, n_categories) log P(feature | category)
+        self.prior = prior      # (n_categories,) log P(category)
+        # Features never seen in training carry no evidence; they are ignored,
+        # and a mostly unfamiliar description gets no suggestion at all
+        self.known = known      # (N_FEATURES,) bool
+
+    @classmethod
+    def fit(cls, descriptions, labels):
+        labels = [str(label) for label in labels]
+        categories = sorted(set(labels))
+        label_ids = {category: i for i, category in enumerate(categories)}
+        rows, cols = [], []
+        for text, label in zip(descriptions, labels):
+            idx = features(text)
+            rows += idx
+            cols += [label_ids[label]] * len(idx)
+        counts = np.zeros((N_FEATURES, len(categories)), dtype=np.float32)
+        np.add.at(counts, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)), 1.0)
+        known = counts.sum(axis=1) > 0
+        counts += SMOOTHING
+        weights = np.log(counts / counts.sum(axis=0))
+        label_counts = np.bincount([label_ids[label] for label in labels], minlength=len(categories))
+        prior = np.log(label_counts / label_counts.sum())
+        return cls(categories, weights.astype(np.float32), prior.astype(np.float32), known)
+
+    def _known_features(self, text):
+        idx = features(text)
+        known = [i for i in idx if self.known[i]]
+        return known if len(known) >= MIN_KNOWN_FRACTION * len(idx) else []
+
+    def _probabilities(self, scores):
+        scores = scores - scores.max(axis=-1, keepdims=True)
+        exp = np.exp(scores)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict_one(self, text):
+        """(category, probability) for one description, or (None, 0.0) if no feature is known."""
+        idx = self._known_features(text)
+        if not idx:
+            return None, 0.0
+        probs = self._probabilities(self.prior + self.weights[idx].sum(axis=0))
+        best = int(probs.argmax())
+        return self.categories[best], float(probs[best])
+
+    def predict(self, texts):
+        """Vectorized predict_one over many descriptions; returns (categories, probabilities)."""
+        feature_lists = [self._known_features(text) for text in texts]
+        lengths = np.array([len(idx) for idx in feature_lists])
+        scores = np.tile(self.prior, (len(texts), 1))
+        if lengths.sum():
+            flat = np.concatenate([np.array(idx, dtype=np.int64) for idx in feature_lists if idx])
+            starts = np.concatenate([[0], np.cumsum(lengths[lengths > 0])[:-1]])
+            scores[lengths > 0] += np.add.reduceat(self.weights[flat], starts, axis=0)
+        probs = self._probabilities(scores)
+        best = probs.argmax(axis=1)
+        categories = np.array(self.categories, dtype=object)[best]
+        categories[lengths == 0] = None
+        confidence = np.where(lengths > 0, probs[np.arange(len(texts)), best], 0.0)
+        return categories.tolist(), confidence
+
+
+def train_user_model(user_id):
+    df = load_expenses(user_id)
+    df = df[df['description'].fillna('').map(normalize_description) != '']
+    if len(df) < MIN_TRAINING_ROWS or df['category'].nunique() < 2:
+        return None
+    return CategoryModel.fit(df['description'].tolist(), df['category'].tolist())
+
+
+def get_user_model(user_id):
+    """The user's cached model, retrained when their expenses change; None without enough history."""
+    version = expense_version(user_id)
+    with _models_lock:
+        cached = _models.get(user_id)
+        if cached is not None and cached[0] == version:
+            _models.move_to_end(user_id)
+            return cached[1]
+    model = train_user_model(user_id)
+    with _models_lock:
+        _models[user_id] = (version, model)
+        while len(_models) > CACHE_SIZE:
+            _models.popitem(last=False)
+    return model
+
+
+def suggest_category(user_id, description):
+    """Predicted category for a new entry, or None when unsure."""
+    model = get_user_model(user_id)
+    if model is None or not description:
+        return None
+    category, confidence = model.predict_one(description)
+    return category if confidence >= MIN_CONFIDENCE else None
+
+
+def suggest_categories(user_id, descriptions):
+    """Batch suggest_category(); None where the model is unsure."""
+    model = get_user_model(user_id)
+    if model is None:
+        return [None] * len(descriptions)
+    categories, confidence = model.predict(descriptions)
+    return [category if p >= MIN_CONFIDENCE else None for category, p in zip(categories, confidence)]
+
+
+def measure_throughput(model, texts, repeat=3):
+    """Best-of-`repeat` timings: microseconds per single prediction and batch rows per second."""
+    single, batch = float('inf'), float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            model.predict_one(text)
+        single = min(single, (time.perf_counter() - start) / len(texts))
+        start = time.perf_counter()
+        model.predict(texts)
+        batch = min(batch, time.perf_counter() - start)
+    return {'single_us': single * 1e6, 'batch_rows_per_sec': len(texts) / batch}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Train a user's categorizer and report accuracy and throughput.")
+    parser.add_argument('user_id', type=int)
+    args = parser.parse_args()
+
+    df = load_expenses(args.user_id)
+    df = df[df['description'].fillna('').map(normalize_description) != ''].sample(frac=1, random_state=0)
+    split = int(len(df) * 0.8)
+    train, test = df.iloc[:split], df.iloc[split:]
+    if len(train) < MIN_TRAINING_ROWS or test.empty:
+        raise SystemExit("Not enough described expenses to evaluate.")
+    start = time.perf_counter()
+    model = CategoryModel.fit(train['description'].tolist(), train['category'].tolist())
+    train_seconds = time.perf_counter() - start
+    predicted, _ = model.predict(test['description'].tolist())
+    accuracy = np.mean(np.array(predicted, dtype=object) == test['category'].to_numpy())
+    stats = measure_throughput(model, test['description'].tolist())
+    print(f"Trained on {len(train)} expenses in {train_seconds * 1000:.1f} ms; "
+          f"held-out accuracy {accuracy:.1%} on {len(test)}")
+    print(f"Single prediction {stats['single_us']:.1f} us; batch {stats['batch_rows_per_sec']:,.0f} rows/s")
@@ -0,0 +1,89 @@
+import numpy as np
+
+# ============ CHART DOWNSAMPLING ============
+# Long series are reduced to roughly one point per horizontal pixel before
+# traces are built, which keeps chart payloads and browser rendering bounded.
+
+# A wide Streamlit chart is about 1000px across; more points than that are not visible
+MAX_CHART_POINTS = 1000
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that best
+    preserve the visual shape of (x, y). The first and last points are kept.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = _as_float(y)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Triangle areas for every candidate in this bucket at once
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, threshold):
+    """Keep the minimum and maximum of each of threshold // 2 buckets, in order."""
+    n = len(y)
+    buckets = threshold // 2
+    if threshold >= n or buckets < 1:
+        return np.arange(n)
+    y = _as_float(y)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    keep = set()
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            keep.add(start + int(np.nanargmin(y[start:end])))
+            keep.add(start + int(np.nanargmax(y[start:end])))
+    return np.array(sorted(keep), dtype=np.int64)
+
+
+def downsample_series(series, threshold=MAX_CHART_POINTS, method='lttb'):
+    """Downsample a Series indexed by its x values (dates or numbers)."""
+    series = series.dropna()
+    if len(series) <= threshold:
+        return series
+    if method == 'minmax':
+        idx = minmax_indices(series.to_numpy(), threshold)
+    else:
+        idx = lttb_indices(series.index.to_numpy(), series.to_numpy(), threshold)
+    return series.iloc[idx]
+
+
+def downsample_frame(df, x, y, threshold=MAX_CHART_POINTS, method='lttb'):
+    """Downsample the rows of a frame sorted by column `x`, judged on column `y`."""
+    df = df.dropna(subset=[y])
+    if len(df) <= threshold:
+        return df
+    if method == 'minmax':
+        idx = minmax_indices(df[y].to_numpy(), threshold)
+    else:
+        idx = lttb_indices(df[x].to_numpy(), df[y].to_numpy(), threshold)
+    return df.iloc[idx]
@@ -0,0 +1,162 @@
+import sqlite3
+import pandas as pd
+import anomalies
+import budgets
+import cashflow
+
+# ============ EXPENSE LEDGER ============
+
+DB_PATH = 'finance_tracker.db'
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def create_tables(c):
+    # Every expense query filters on the user and usually a date range;
+    # the category index serves the filter's list of categories
+    c.execute("CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_id, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_expenses_user_category ON expenses (user_id, category)")
+
+    # Bumped by in-place edits (such as recategorization) that leave the
+    # row count, ids and amounts unchanged, so cached analytics notice them
+    c.execute('''CREATE TABLE IF NOT EXISTS expense_revisions
+                 (user_id INTEGER PRIMARY KEY,
+                  revision INTEGER)''')
+
+
+def bump_revision(conn, user_id):
+    """Mark the user's expenses as changed in place. The caller commits."""
+    conn.execute("""
+        INSERT INTO expense_revisions (user_id, revision) VALUES (?, 1)
+        ON CONFLICT(user_id) DO UPDATE SET revision = revision + 1
+    """, (user_id,))
+
+
+def add_expense(user_id, date, amount, category, description):
+    """
+    Insert an expense and update the unusual-expense detector, budget
+    counters and monthly cash flow in the same transaction. Returns the alert dict if the expense
+    looks unusual.
+    """
+    return add_expenses(user_id, [(date, amount, category, description)])[0]
+
+
+def add_expenses(user_id, rows):
+    """
+    Insert (date, amount, category, description) rows in one transaction,
+    in order. Returns one alert dict or None per row.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    alerts = []
+    for date, amount, category, description in rows:
+        c.execute("""
+            INSERT INTO expenses (user_id, date, amount, category, description)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, date, amount, category, description))
+        alerts.append(anomalies.observe_expense(conn, user_id, c.lastrowid, date, category, amount))
+        budgets.record_spend(conn, user_id, category, date, amount)
+        cashflow.record_cashflow(conn, user_id, date, expenses=amount)
+    conn.commit()
+    conn.close()
+    return alerts
+
+
+def _where(user_id, start=None, end=None, categories=None):
+    """SQL predicate and parameters for a user's expenses, optionally filtered."""
+    clauses, params = ["user_id = ?"], [user_id]
+    if start is not None:
+        clauses.append("date >= ?")
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        clauses.append("date <= ?")
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    if categories:
+        clauses.append(f"category IN ({','.join('?' * len(categories))})")
+        params.extend(categories)
+    return " AND ".join(clauses), params
+
+
+def load_expenses(user_id, start=None, end=None, categories=None):
+    """
+    A user's expenses, optionally limited to dates from `start` to `end`
+    (inclusive) and to a list of categories. The filters run in SQL on the
+    (user_id, date) index, so only matching rows are read.
+    """
+    where, params = _where(user_id, start, end, categories)
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(f"""
+        SELECT date, amount, category, description
+        FROM expenses
+        WHERE {where}
+        ORDER BY date
+    """, conn, params=params)
+    conn.close()
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def expense_categories(user_id):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT DISTINCT category FROM expenses WHERE user_id = ? ORDER BY category", (user_id,))
+    categories = [row[0] for row in c.fetchall()]
+    conn.close()
+    return categories
+
+
+def expense_version(user_id, start=None, end=None, categories=None):
+    """
+    Changes whenever the user's expenses (within the same filters as
+    load_expenses) change; used as a cache key.
+    """
+    where, params = _where(user_id, start, end, categories)
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute(f"""
+        SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(SUM(amount), 0),
+               COALESCE((SELECT revision FROM expense_revisions WHERE user_id = ?), 0)
+        FROM expenses WHERE {where}
+    """, [user_id] + params)
+    version = c.fetchone()
+    conn.close()
+    return version
+
+
+# ============ TIME BUCKETS ============
+# Every expense chart, insight and summary metric reads from one set of
+# date-bucketed series, built in a single pass per data version.
+
+def bucket_expenses(df):
+    """
+    Time-bucketed totals of an expenses frame (date, amount, category):
+      daily             - total per day with spending (DatetimeIndex)
+      weekly            - total per calendar week, zero-filled (week-ending DatetimeIndex)
+      monthly           - total per month with spending (PeriodIndex)
+      weekday           - average daily total per weekday, Monday first
+      by_category       - total per category
+      by_month_category - month x category totals; NaN where a category had no spending
+    """
+    if df.empty:
+        empty = pd.Series(dtype=float)
+        return {'daily': empty, 'weekly': empty, 'monthly': empty, 'weekday': empty,
+                'by_category': empty, 'by_month_category': pd.DataFrame()}
+
+    day = df['date'].dt.normalize()
+    # The finest bucket is computed from the rows; every coarser one derives from it
+    by_day_category = df.groupby([day, df['category']])['amount'].sum().unstack()
+    daily = by_day_category.sum(axis=1)
+    daily.index.name = 'date'
+
+    month = daily.index.to_period('M')
+    by_month_category = by_day_category.groupby(month).sum(min_count=1)
+    weekday = daily.groupby(daily.index.day_name()).mean().reindex(WEEKDAYS).dropna()
+
+    return {
+        'daily': daily,
+        'weekly': daily.resample('W').sum(),
+        'monthly': daily.groupby(month).sum(),
+        'weekday': weekday,
+        'by_category': by_month_category.sum(),
+        'by_month_category': by_month_category,
+    }
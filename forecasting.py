@@ -0,0 +1,131 @@
+import threading
+import numpy as np
+import pandas as pd
+from expenses import load_expenses, expense_version, bucket_expenses
+
+# ============ EXPENSE FORECASTING ============
+# Monthly spend per category is forecast with a small set of seasonal models
+# fitted to all categories at once: each model runs over the months x
+# categories matrix column-wise, and every category keeps the model with the
+# lowest one-step-ahead error. Fitted forecasts are cached per user until the
+# expense data changes.
+
+SEASON = 12
+HORIZON = 12
+DAMPING = 0.9
+SES_ALPHAS = (0.2, 0.4, 0.6)
+# (alpha, beta, gamma) grid searched for Holt-Winters
+HW_GRID = [(a, b, g) for a in (0.1, 0.3, 0.5) for b in (0.0, 0.1) for g in (0.1, 0.3)]
+
+_cache = {}  # user_id -> ((version, horizon), result)
+_cache_lock = threading.Lock()
+
+
+def _ses(y, alpha):
+    """Simple exponential smoothing. Returns (one-step errors, flat forecast)."""
+    level = y[0].copy()
+    errors = np.full(y.shape, np.nan)
+    for t in range(1, len(y)):
+        errors[t] = y[t] - level
+        level = level + alpha * errors[t]
+    return errors, level
+
+
+def _seasonal_naive(y, horizon):
+    errors = np.full(y.shape, np.nan)
+    errors[SEASON:] = y[SEASON:] - y[:-SEASON]
+    last_season = y[-SEASON:]
+    forecast = np.array([last_season[h % SEASON] for h in range(horizon)])
+    return errors, forecast
+
+
+def _holt_winters(y, alpha, beta, gamma, horizon):
+    """Additive Holt-Winters with a damped trend, one column per category."""
+    level = y[:SEASON].mean(axis=0)
+    trend = (y[SEASON:2 * SEASON].mean(axis=0) - level) / SEASON
+    season = y[:SEASON] - level
+    errors = np.full(y.shape, np.nan)
+    for t in range(SEASON, len(y)):
+        s = season[t % SEASON]
+        errors[t] = y[t] - (level + DAMPING * trend + s)
+        new_level = alpha * (y[t] - s) + (1 - alpha) * (level + DAMPING * trend)
+        trend = beta * (new_level - level) + (1 - beta) * DAMPING * trend
+        season[t % SEASON] = gamma * (y[t] - new_level) + (1 - gamma) * s
+        level = new_level
+    steps = np.cumsum(DAMPING ** np.arange(1, horizon + 1))
+    forecast = np.array([level + steps[h] * trend + season[(len(y) + h) % SEASON]
+                         for h in range(horizon)])
+    return errors, forecast
+
+
+def forecast_categories(by_month_category, horizon=HORIZON, today=None):
+    """
+    Forecast each column of a month x category totals frame (PeriodIndex;
+    NaN or missing months count as no spending). Only complete months
+    before the one containing `today` are fitted, and the forecast starts
+    with that current month.
+
+    Returns a dict:
+      history  - zero-filled monthly totals the models were fitted on
+      forecast - `horizon` months x category from the current month (PeriodIndex)
+      model    - Series category -> chosen model name
+      mae      - Series category -> its one-step-ahead mean absolute error
+    """
+    current = pd.Period(pd.Timestamp(today or pd.Timestamp.today()), freq='M')
+    # A month still in progress would be fitted as an unusually cheap month
+    by_month_category = by_month_category[by_month_category.index < current]
+    if by_month_category.empty:
+        empty = pd.DataFrame()
+        return {'history': empty, 'forecast': empty,
+                'model': pd.Series(dtype=object), 'mae': pd.Series(dtype=float)}
+
+    # Months without expenses up to the current one count as no spending
+    months = pd.period_range(by_month_category.index.min(), current - 1, freq='M')
+    history = by_month_category.reindex(months).fillna(0.0)
+    y = history.to_numpy(dtype=float)
+    n = len(y)
+
+    candidates = []  # (name, errors, forecast) with forecast shaped (horizon, K)
+    for alpha in SES_ALPHAS:
+        errors, level = _ses(y, alpha)
+        candidates.append(('Exponential smoothing', errors, np.tile(level, (horizon, 1))))
+    if n > SEASON:
+        candidates.append(('Seasonal naive',) + _seasonal_naive(y, horizon))
+    if n >= 2 * SEASON:
+        for alpha, beta, gamma in HW_GRID:
+            candidates.append(('Holt-Winters',) + _holt_winters(y, alpha, beta, gamma, horizon))
+
+    # Score every candidate on the same months: those all of them can predict
+    start = SEASON if n > SEASON else 1
+    if n > start:
+        mae = np.array([np.abs(errors[start:]).mean(axis=0) for _, errors, _ in candidates])
+    else:
+        # A single month of history: nothing to score, keep the flat forecast
+        mae = np.zeros((len(candidates), y.shape[1]))
+    best = mae.argmin(axis=0)
+
+    columns = np.arange(y.shape[1])
+    forecasts = np.stack([forecast for _, _, forecast in candidates])  # (models, horizon, K)
+    forecast = np.clip(forecasts[best, :, columns].T, 0.0, None)
+    future = pd.period_range(current, periods=horizon, freq='M')
+
+    return {
+        'history': history,
+        'forecast': pd.DataFrame(forecast, index=future, columns=history.columns),
+        'model': pd.Series([candidates[i][0] for i in best], index=history.columns),
+        'mae': pd.Series(mae[best, columns], index=history.columns),
+    }
+
+
+def forecast_user_expenses(user_id, horizon=HORIZON):
+    """Cached forecast_categories() of a user's expenses; refitted when they change or a month ends."""
+    key = (expense_version(user_id), horizon, pd.Period(pd.Timestamp.today(), freq='M'))
+    with _cache_lock:
+        cached = _cache.get(user_id)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    buckets = bucket_expenses(load_expenses(user_id))
+    result = forecast_categories(buckets['by_month_category'], horizon, today=key[2].start_time)
+    with _cache_lock:
+        _cache[user_id] = (key, result)
+    return result
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import requests
+
+# ============ FX RATES ============
+# One rate table shared by every session and persisted to disk, refreshed at
+# most once per FX_TTL seconds. Conversions multiply whole arrays or Series
+# by a single rate instead of converting row by row.
+
+FX_API_URL = "https://api.exchangerate-api.com/v4/latest/{base}"
+DB_PATH = 'finance_tracker.db'
+FX_CACHE_FILE = os.getenv('FX_CACHE_FILE', 'fx_rates.json')
+FX_TTL = float(os.getenv('FX_TTL', str(12 * 3600)))
+FX_RETRY_DELAY = 300
+BASE_CURRENCY = "INR"
+
+# Used only when there is neither a cached table nor a reachable API
+FALLBACK_RATES = {
+    "INR": 1.0, "USD": 0.012, "AED": 0.044, "SAR": 0.045,
+    "CAD": 0.016, "QAR": 0.044, "CNY": 0.086,
+}
+
+_rates = None  # {"base": ..., "fetched_at": epoch seconds, "rates": {...}}
+_retry_after = 0.0  # after a failed refresh, wait before calling the API again
+_lock = threading.Lock()
+
+
+def _read_cache():
+    try:
+        with open(FX_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(table):
+    tmp = f"{FX_CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(table, f)
+    os.replace(tmp, FX_CACHE_FILE)
+
+
+def _fetch(base):
+    response = requests.get(FX_API_URL.format(base=base), timeout=5)
+    response.raise_for_status()
+    return {"base": base, "fetched_at": time.time(), "rates": response.json()['rates']}
+
+
+def get_rate_table(max_age=FX_TTL):
+    """
+    Current rate table, from memory, then disk, then the API.
+    A stale table is kept if the refresh fails, so callers always get rates.
+    """
+    global _rates, _retry_after
+    with _lock:
+        if _rates is None:
+            _rates = _read_cache()
+        now = time.time()
+        if _rates is not None and (now - _rates['fetched_at'] < max_age or now < _retry_after):
+            return _rates
+        try:
+            _rates = _fetch(BASE_CURRENCY)
+            _write_cache(_rates)
+            record_history(_rates)
+        except (requests.RequestException, ValueError, KeyError, OSError):
+            _retry_after = now + FX_RETRY_DELAY
+            if _rates is None:
+                _rates = {"base": BASE_CURRENCY, "fetched_at": 0.0, "rates": dict(FALLBACK_RATES)}
+        return _rates
+
+
+def get_rate(from_currency, to_currency):
+    """Multiplier converting `from_currency` to `to_currency`, or None if unknown."""
+    if from_currency == to_currency:
+        return 1.0
+    rates = get_rate_table()['rates']
+    if from_currency not in rates or to_currency not in rates:
+        return None
+    return rates[to_currency] / rates[from_currency]
+
+
+def convert(amounts, to_currency, from_currency=BASE_CURRENCY):
+    """
+    Convert a scalar, NumPy array or pandas Series in one multiplication.
+    Raises KeyError when no rate is known for the currency pair.
+    """
+    rate = get_rate(from_currency, to_currency)
+    if rate is None:
+        raise KeyError(f"No exchange rate from {from_currency} to {to_currency}")
+    if isinstance(amounts, (list, tuple)):
+        amounts = np.asarray(amounts, dtype=float)
+    return amounts * rate
+
+
+# ============ HISTORICAL RATES ============
+# fx_history stores one INR-based rate per currency per day. Each successful
+# refresh records that day's table, and backfill_history() loads past rates
+# from Yahoo FX pairs. Expenses are converted at the rate of their
+# own date with a single merge_asof.
+
+def create_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS fx_history
+                 (date TEXT,
+                  currency TEXT,
+                  rate REAL,
+                  PRIMARY KEY (date, currency))''')
+
+
+def record_history(table):
+    day = datetime.fromtimestamp(table['fetched_at']).strftime("%Y-%m-%d")
+    rows = [(day, currency, rate) for currency, rate in table['rates'].items()]
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.executemany("INSERT OR REPLACE INTO fx_history (date, currency, rate) VALUES (?, ?, ?)", rows)
+        conn.commit()
+        conn.close()
+    except sqlite3.OperationalError:
+        # Table not created yet (init_db has not run); the next refresh records it
+        pass
+
+
+def backfill_history(currencies, period='5y', provider=None):
+    """
+    Load daily history for each currency from Yahoo FX pairs (e.g. INRUSD=X).
+    Always uses live yfinance data unless a provider is given; the replay
+    provider's synthetic prices are refused, since stored rates convert real
+    expenses. Returns (rows written, currencies that could not be loaded).
+    """
+    if provider is None:
+        from market_data import YFinanceProvider
+        provider = YFinanceProvider()
+    if provider.name == 'replay':
+        raise ValueError("Historical exchange rates cannot be loaded from the replay provider")
+    rows, failed = [], []
+    for currency in currencies:
+        if currency == BASE_CURRENCY:
+            continue
+        try:
+            hist = provider.history(f"{BASE_CURRENCY}{currency}=X", period=period)
+        except Exception:
+            failed.append(currency)
+            continue
+        if hist.empty:
+            failed.append(currency)
+            continue
+        dates = pd.DatetimeIndex(hist.index).strftime("%Y-%m-%d")
+        rows.extend(zip(dates, [currency] * len(hist), hist['Close'].astype(float)))
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany("INSERT OR REPLACE INTO fx_history (date, currency, rate) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return len(rows), failed
+
+
+def load_history(currency):
+    """
+    INR -> `currency` rates as a date-sorted frame with `date` and `rate`
+    columns; empty when nothing is stored (or the table does not exist yet).
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        df = pd.read_sql_query("SELECT date, rate FROM fx_history WHERE currency = ? ORDER BY date",
+                               conn, params=(currency,))
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        df = pd.DataFrame(columns=['date', 'rate'])
+    finally:
+        conn.close()
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def convert_as_of(amounts, dates, to_currency, from_currency=BASE_CURRENCY):
+    """
+    Convert each amount at the rate in force on its own date.
+    `amounts` and `dates` are aligned Series; returns a Series with the same
+    index. Dates before the first stored rate use the earliest one, and pairs
+    with no history at all fall back to today's rate.
+    """
+    if from_currency == to_currency:
+        return amounts.astype(float)
+
+    frame = pd.DataFrame({'date': pd.to_datetime(dates).to_numpy(),
+                          'amount': amounts.to_numpy(dtype=float),
+                          'pos': np.arange(len(amounts))}).sort_values('date')
+
+    def rates_for(currency):
+        if currency == BASE_CURRENCY:
+            return np.ones(len(frame))
+        history = load_history(currency)
+        if history.empty:
+            return np.full(len(frame), np.nan)
+        merged = pd.merge_asof(frame[['date']], history, on='date', direction='backward')
+        return merged['rate'].fillna(history['rate'].iloc[0]).to_numpy()
+
+    # INR-based rates: from -> to is rate(to) / rate(from)
+    factor = rates_for(to_currency) / rates_for(from_currency)
+    missing = np.isnan(factor)
+    if missing.any():
+        factor[missing] = get_rate(from_currency, to_currency)
+    converted = np.empty(len(frame))
+    converted[frame['pos'].to_numpy()] = frame['amount'].to_numpy() * factor
+    return pd.Series(converted, index=amounts.index)
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# ============ TECHNICAL INDICATORS ============
+# Vectorized indicators over a Close price Series. compute() memoizes results
+# per (symbol, indicator, parameters) in a process-wide cache shared by all
+# sessions; the key includes the last bar, so new prices invalidate it.
+
+CACHE_SIZE = 512
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def sma(close, window=20):
+    return close.rolling(window, min_periods=window).mean()
+
+
+def ema(close, window=20):
+    return close.ewm(span=window, adjust=False, min_periods=window).mean()
+
+
+def rsi(close, window=14):
+    # Wilder's smoothing of average gains and losses
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    rs = gain / loss.replace(0, np.nan)
+    return (100 - 100 / (1 + rs)).where(loss != 0, 100.0).where(gain.notna())
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = line.ewm(span=signal, adjust=False, min_periods=signal).mean()
+    return pd.DataFrame({'MACD': line, 'Signal': signal_line, 'Histogram': line - signal_line})
+
+
+def bollinger(close, window=20, num_std=2.0):
+    middle = sma(close, window)
+    std = close.rolling(window, min_periods=window).std(ddof=0)
+    return pd.DataFrame({'Middle': middle, 'Upper': middle + num_std * std, 'Lower': middle - num_std * std})
+
+
+INDICATORS = {
+    'SMA': sma,
+    'EMA': ema,
+    'RSI': rsi,
+    'MACD': macd,
+    'Bollinger': bollinger,
+}
+
+
+def compute(symbol, close, name, **params):
+    """Memoized INDICATORS[name](close, **params) for `symbol`."""
+    close = close.dropna()
+    if close.empty:
+        return INDICATORS[name](close, **params)
+    key = (symbol, name, tuple(sorted(params.items())),
+           len(close), close.index[0], close.index[-1], float(close.iloc[-1]))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    result = INDICATORS[name](close, **params)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,420 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from watchlists import symbol_market
+import price_store
+import quote_cache
+
+# ============ MARKET DATA PROVIDERS ============
+# Page functions ask a provider for price history instead of calling yfinance
+# directly, so the dashboard can run against recorded or synthetic data.
+
+OHLC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Approximate trading days per yfinance period string
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126,
+    '1y': 252, '2y': 504, '5y': 1260, '10y': 2520, 'max': 5040,
+}
+
+
+class MarketDataProvider:
+    """
+    Base interface for market data sources.
+    history() returns a DataFrame indexed by date with OHLC_COLUMNS,
+    or an empty DataFrame when the symbol has no data.
+    """
+    name = "base"
+
+    def history(self, symbol, period='1mo'):
+        raise NotImplementedError
+
+    def history_many(self, symbols, period='1mo'):
+        return {symbol: self.history(symbol, period) for symbol in symbols}
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def history(self, symbol, period='1mo'):
+        import yfinance as yf
+        # Raw prices plus Dividends / Stock Splits; adjustment happens in price_store.
+        # The request timeout frees the pool thread soon after fetch_histories stops waiting.
+        return yf.Ticker(symbol).history(period=period, auto_adjust=False, actions=True,
+                                         timeout=REQUEST_TIMEOUT)
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Offline provider for tests and benchmarks.
+    Replays <fixtures_dir>/<symbol>.csv when a recording exists, otherwise
+    generates a random walk seeded from the symbol name, so the same symbol
+    always produces the same prices. `latency` adds an artificial delay per
+    call to simulate a slow upstream.
+    """
+    name = "replay"
+
+    def __init__(self, fixtures_dir=None, end=None, latency=0.0):
+        self.fixtures_dir = fixtures_dir
+        self.end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp.today().normalize()
+        self.latency = latency
+
+    def _fixture_path(self, symbol):
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, f"{symbol}.csv")
+        return path if os.path.exists(path) else None
+
+    def _synthetic(self, symbol, days):
+        seed = int(hashlib.md5(symbol.encode()).hexdigest()[:8], 16)
+        rng = np.random.default_rng(seed)
+        # Generate the full series once so shorter periods are a suffix of longer ones
+        total = PERIOD_DAYS['max']
+        base = 50 + (seed % 3000)
+        log_returns = rng.normal(0.0003, 0.015, total)
+        close = base * np.exp(np.cumsum(log_returns))
+        open_ = close * (1 + rng.normal(0, 0.005, total))
+        high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, total)))
+        low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, total)))
+        volume = rng.integers(100_000, 5_000_000, total)
+        index = pd.bdate_range(end=self.end, periods=total, name='Date')
+        frame = pd.DataFrame({
+            'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume
+        }, index=index)
+        return frame.iloc[-days:]
+
+    def history(self, symbol, period='1mo'):
+        if self.latency:
+            time.sleep(self.latency)
+        days = PERIOD_DAYS.get(period, PERIOD_DAYS['1mo'])
+        path = self._fixture_path(symbol)
+        if path:
+            frame = pd.read_csv(path, index_col=0, parse_dates=True)
+            return frame[OHLC_COLUMNS].iloc[-days:]
+        return self._synthetic(symbol, days)
+
+
+def record_fixtures(symbols, fixtures_dir, period='1y', provider=None):
+    """Save live history for `symbols` as CSV fixtures for ReplayProvider."""
+    provider = provider or YFinanceProvider()
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for symbol in symbols:
+        hist = provider.history(symbol, period)
+        if not hist.empty:
+            hist[OHLC_COLUMNS].to_csv(os.path.join(fixtures_dir, f"{symbol}.csv"))
+
+
+def get_provider():
+    """
+    Build the provider selected by the MARKET_DATA_PROVIDER environment
+    variable ("yfinance" by default, or "replay").
+    """
+    name = os.getenv('MARKET_DATA_PROVIDER', 'yfinance').lower()
+    if name == 'replay':
+        return ReplayProvider(
+            fixtures_dir=os.getenv('MARKET_DATA_FIXTURES'),
+            latency=float(os.getenv('MARKET_DATA_LATENCY', '0') or 0),
+        )
+    return YFinanceProvider()
+
+
+# ============ LATENCY BUDGET & CIRCUIT BREAKER ============
+# Fetches run concurrently on a shared pool. Each request gets REQUEST_TIMEOUT
+# seconds and a whole fetch never takes longer than RENDER_BUDGET seconds.
+# Symbols that fail or time out are served from the last good response.
+# Responses are also shared between worker processes through quote_cache, so
+# a multi-process deployment makes one upstream request per refresh.
+
+REQUEST_TIMEOUT = float(os.getenv('MARKET_REQUEST_TIMEOUT', '3'))
+RENDER_BUDGET = float(os.getenv('MARKET_RENDER_BUDGET', '5'))
+# Responses younger than this are reused without going upstream
+REFRESH_INTERVAL = float(os.getenv('MARKET_REFRESH_INTERVAL', '60'))
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='market-fetch')
+# Refreshes nobody is waiting on run on their own small pool, so they never
+# hold up the symbols a page is rendering
+_background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='market-refresh')
+_last_known = {}  # (provider name, symbol, period) -> (history, fetched_at)
+_in_flight = {}   # (provider name, symbol, period) -> Future shared by concurrent callers
+_last_known_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds. After that one trial batch is let through
+    (half-open); a success closes the breaker, a failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        return self.state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+
+
+def get_breaker(provider):
+    if provider.name not in _breakers:
+        _breakers[provider.name] = CircuitBreaker()
+    return _breakers[provider.name]
+
+
+def _fetch_and_store(provider, symbol, period):
+    hist = provider.history(symbol, period)
+    try:
+        price_store.save_history(symbol, hist)
+    except sqlite3.Error:
+        # The store is an optimisation; a locked or missing table must not fail the fetch
+        pass
+    return hist
+
+
+def _fetch_shared(provider, symbol, period, max_age):
+    """
+    Fetch through the cross-process cache: use an entry another worker
+    stored within `max_age`, otherwise take the refresh lease and fetch, or
+    wait for the worker holding the lease to publish its result.
+    """
+    try:
+        while True:
+            cached = quote_cache.get(provider.name, symbol, period, max_age)
+            if cached is not None:
+                return cached[0]
+            if quote_cache.claim(provider.name, symbol, period, max_age):
+                break
+            time.sleep(0.1)
+    except sqlite3.Error:
+        # An unusable shared cache degrades to a per-process fetch
+        return _fetch_and_store(provider, symbol, period)
+
+    try:
+        hist = _fetch_and_store(provider, symbol, period)
+    except Exception:
+        try:
+            quote_cache.release(provider.name, symbol, period)
+        except sqlite3.Error:
+            pass
+        raise
+    try:
+        if hist is not None and not hist.empty:
+            quote_cache.put(provider.name, symbol, period, hist)
+        else:
+            quote_cache.release(provider.name, symbol, period)
+    except sqlite3.Error:
+        pass
+    return hist
+
+
+def _shared_entries(provider, symbols, period, max_age=None):
+    try:
+        entries = quote_cache.get_many(provider.name, symbols, period, max_age)
+    except sqlite3.Error:
+        return {}
+    return {symbol: (hist, datetime.fromtimestamp(fetched_at))
+            for symbol, (hist, fetched_at) in entries.items()}
+
+
+def fetch_histories(symbols, period='1mo', provider=None,
+                    timeout=REQUEST_TIMEOUT, budget=RENDER_BUDGET,
+                    max_age=REFRESH_INTERVAL):
+    """
+    Fetch history for all `symbols` within the latency budget.
+    Symbols refreshed less than `max_age` seconds ago are served from memory
+    or from the cache shared with other worker processes, so concurrent
+    sessions asking for the same symbols share one refresh.
+
+    Returns (histories, stale, failed):
+      histories - dict symbol -> DataFrame for every symbol we could serve
+      stale     - dict symbol -> datetime of the last-known data served
+                  instead of a fresh response
+      failed    - symbols with neither fresh nor last-known data
+    """
+    provider = provider or get_provider()
+    breaker = get_breaker(provider)
+    histories, stale, failed = {}, {}, []
+
+    now = datetime.now()
+    with _last_known_lock:
+        for symbol in symbols:
+            cached = _last_known.get((provider.name, symbol, period))
+            if cached is not None and (now - cached[1]).total_seconds() < max_age:
+                histories[symbol] = cached[0]
+    missing = [symbol for symbol in symbols if symbol not in histories]
+    for symbol, entry in _shared_entries(provider, missing, period, max_age).items():
+        histories[symbol] = entry[0]
+        with _last_known_lock:
+            _last_known[(provider.name, symbol, period)] = entry
+    to_fetch = [symbol for symbol in symbols if symbol not in histories]
+
+    pending = {}
+    if to_fetch and breaker.allow():
+        with _last_known_lock:
+            for symbol in to_fetch:
+                key = (provider.name, symbol, period)
+                future = _in_flight.get(key)
+                # A background refresh still queued is cancelled and fetched here instead
+                if future is None or future.done() or future.cancel():
+                    future = _executor.submit(_fetch_shared, provider, symbol, period, max_age)
+                    _in_flight[key] = future
+                pending[symbol] = future
+        done, _ = wait(list(pending.values()), timeout=min(timeout, budget))
+    else:
+        done = set()
+
+    any_success = False
+    any_failure = False
+    unserved = []
+    for symbol in to_fetch:
+        future = pending.get(symbol)
+        key = (provider.name, symbol, period)
+        if future is not None and future in done and future.exception() is None:
+            hist = future.result()
+            any_success = True
+            if hist is not None and not hist.empty:
+                histories[symbol] = hist
+                with _last_known_lock:
+                    _last_known[key] = (hist, datetime.now())
+                continue
+        elif future is not None:
+            # Timed out or raised; a hung request keeps running in the pool
+            # but is no longer waited on.
+            future.cancel()
+            any_failure = True
+
+        with _last_known_lock:
+            cached = _last_known.get(key)
+        if cached is not None:
+            histories[symbol], stale[symbol] = cached
+        else:
+            unserved.append(symbol)
+
+    # A freshly started worker can still serve what another one fetched;
+    # one query covers every symbol left without data
+    shared = _shared_entries(provider, unserved, period)
+    for symbol in unserved:
+        if symbol in shared:
+            histories[symbol], stale[symbol] = shared[symbol]
+        else:
+            failed.append(symbol)
+
+    if any_success:
+        breaker.record_success()
+    elif any_failure:
+        breaker.record_failure()
+
+    return histories, stale, failed
+
+
+def _remember(key, future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    hist = future.result()
+    if hist is not None and not hist.empty:
+        with _last_known_lock:
+            _last_known[key] = (hist, datetime.now())
+
+
+def refresh_in_background(symbols, period='1mo', provider=None, max_age=REFRESH_INTERVAL):
+    """
+    Start refreshing `symbols` that are not fresh in memory and return
+    without waiting. Results go to memory and the shared cache, so a later
+    fetch_histories() for them is served without an upstream call.
+    """
+    provider = provider or get_provider()
+    if not get_breaker(provider).allow():
+        return
+    now = datetime.now()
+    with _last_known_lock:
+        for symbol in symbols:
+            key = (provider.name, symbol, period)
+            cached = _last_known.get(key)
+            if cached is not None and (now - cached[1]).total_seconds() < max_age:
+                continue
+            future = _in_flight.get(key)
+            if future is not None and not future.done():
+                continue
+            future = _background_executor.submit(_fetch_shared, provider, symbol, period, max_age)
+            future.add_done_callback(partial(_remember, key))
+            _in_flight[key] = future
+
+
+# ============ QUOTE FRAME ============
+
+def _naive_dates(index):
+    # yfinance returns exchange-local tz-aware timestamps; align markets on calendar dates
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def price_matrix(histories, field='Close'):
+    """Wide frame of one OHLC field: rows are dates, columns are symbols."""
+    if not histories:
+        return pd.DataFrame()
+    columns = {}
+    for symbol, hist in histories.items():
+        series = pd.Series(hist[field].to_numpy(), index=_naive_dates(hist.index))
+        columns[symbol] = series[~series.index.duplicated(keep='last')]
+    return pd.concat(columns, axis=1).sort_index()
+
+
+def build_quote_frame(histories):
+    """
+    Latest quote per symbol, computed column-wise from the batched histories.
+    Returns (quotes, closes) where quotes has Price, Change, Change % and
+    Market columns indexed by symbol, and closes is the split- and
+    dividend-adjusted Close price matrix used for the trend charts and
+    indicators (rebased so the latest close is the quoted price).
+    """
+    closes = price_matrix(histories, 'Close')
+    if closes.empty:
+        return pd.DataFrame(columns=['Price', 'Change', 'Change %', 'Market']), closes
+    opens = price_matrix(histories, 'Open')
+    last_close = closes.ffill().iloc[-1]
+    last_open = opens.ffill().iloc[-1]
+    change = last_close - last_open
+    quotes = pd.DataFrame({
+        'Price': last_close,
+        'Change': change,
+        'Change %': change / last_open * 100,
+        'Market': [symbol_market(symbol) for symbol in closes.columns],
+    }, index=closes.columns)
+    try:
+        adjusted = price_store.adjust_closes(closes, rebase=True)
+    except sqlite3.Error:
+        adjusted = closes
+    return quotes, adjusted
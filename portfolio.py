@@ -0,0 +1,185 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+from market_data import fetch_histories, price_matrix
+from watchlists import symbol_currency
+import price_store
+import fx
+
+# ============ HOLDINGS LEDGER ============
+# Holdings are derived from a transactions table and marked to market in one
+# vectorized pass over the cached price matrix. Trade prices are entered in
+# each symbol's own currency; values are reported in INR.
+
+DB_PATH = 'finance_tracker.db'
+
+ASSET_CLASSES = ["Equity", "Debt", "Gold", "Other"]
+
+
+def add_transaction(user_id, date, symbol, asset_class, txn_type, quantity, price):
+    """Record a trade. Raises ValueError for a sell of more units than are held on its date."""
+    symbol = symbol.strip().upper()
+    if txn_type == 'SELL':
+        held = units_held(user_id, symbol, date)
+        if quantity > held + 1e-9:
+            raise ValueError(f"Cannot sell {quantity:g} {symbol}: only {held:g} held on {date}")
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO transactions (user_id, date, symbol, asset_class, type, quantity, price)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (user_id, date, symbol, asset_class, txn_type, quantity, price))
+    conn.commit()
+    conn.close()
+
+
+def load_transactions(user_id):
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query("""
+        SELECT date, symbol, asset_class, type, quantity, price
+        FROM transactions
+        WHERE user_id = ?
+        ORDER BY date, id
+    """, conn, params=(user_id,))
+    conn.close()
+    df['date'] = pd.to_datetime(df['date'])
+    # Signed units and cash flows: buys add units and take cash out
+    sign = np.where(df['type'] == 'SELL', -1.0, 1.0)
+    df['units'] = df['quantity'] * sign
+    df['cash_flow'] = -df['units'] * df['price']
+    return df
+
+
+def units_held(user_id, symbol, date):
+    """Units of `symbol` held at the close of `date`, after splits."""
+    transactions = load_transactions(user_id)
+    date = pd.Timestamp(date)
+    transactions = transactions[(transactions['symbol'] == symbol) & (transactions['date'] <= date)]
+    if transactions.empty:
+        return 0.0
+    return float(position_matrix(transactions, pd.DatetimeIndex([date]))[symbol].iloc[-1])
+
+
+def ledger_version(user_id):
+    """Changes whenever the user's transactions change; used as a cache key."""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM transactions WHERE user_id = ?", (user_id,))
+    version = c.fetchone()
+    conn.close()
+    return version
+
+
+def history_period(start):
+    """Smallest yfinance period that covers dates back to `start`."""
+    days = (pd.Timestamp.today() - pd.Timestamp(start)).days
+    for period, limit in (('1mo', 28), ('6mo', 180), ('1y', 360), ('2y', 725), ('5y', 1820), ('10y', 3650)):
+        if days <= limit:
+            return period
+    return 'max'
+
+
+def position_matrix(transactions, dates):
+    """
+    Units held of each symbol at the close of every date in `dates`, with
+    stock splits after each trade applied to the units it bought or sold.
+    """
+    symbols = sorted(transactions['symbol'].unique())
+    splits = price_store.split_factors(symbols, dates.union(pd.DatetimeIndex(transactions['date'].unique())))
+    # Units in terms of the symbol's pre-split share count, so they add up across splits
+    trade_factor = splits.to_numpy()[splits.index.get_indexer(transactions['date']),
+                                     splits.columns.get_indexer(transactions['symbol'])]
+    normalized = transactions.assign(units=transactions['units'] / trade_factor)
+    daily = normalized.pivot_table(index='date', columns='symbol', values='units', aggfunc='sum')
+    held = daily.cumsum()
+    # Carry positions onto every price date, zero before the first trade
+    held = held.reindex(held.index.union(dates)).ffill().fillna(0.0).reindex(dates)
+    return held * splits.reindex(index=dates, columns=held.columns)
+
+
+def mark_to_market(transactions, closes):
+    """
+    Value every holding on every price date in one pass.
+    Returns (values, current, prices) where values is a dates x symbols frame
+    of market value, current holds units, last price and value per symbol and
+    prices is the price matrix that was used.
+    """
+    closes = closes.ffill()
+    # Before a symbol's first cached price fall back to its trade price
+    trade_prices = transactions.pivot_table(index='date', columns='symbol', values='price', aggfunc='last')
+    trade_prices = trade_prices.reindex(trade_prices.index.union(closes.index)).ffill().reindex(closes.index)
+    prices = closes.reindex(columns=trade_prices.columns).fillna(trade_prices)
+
+    positions = position_matrix(transactions, prices.index)
+    values = (positions * prices).fillna(0.0)
+
+    asset_class = transactions.groupby('symbol')['asset_class'].last()
+    current = pd.DataFrame({
+        'Units': positions.iloc[-1],
+        'Price': prices.iloc[-1],
+        'Value': values.iloc[-1],
+        'Asset Class': asset_class,
+    })
+    current = current[current['Units'].abs() > 1e-9]
+    return values, current, prices
+
+
+def inr_rates(symbols, dates):
+    """
+    Dates x symbols multipliers converting each symbol's quote currency to
+    INR at the rate in force on each date (1.0 for INR-quoted symbols).
+    """
+    rates = pd.DataFrame(1.0, index=dates, columns=symbols)
+    currencies = {symbol: symbol_currency(symbol) for symbol in symbols}
+    for currency in set(currencies.values()) - {fx.BASE_CURRENCY}:
+        columns = [symbol for symbol in symbols if currencies[symbol] == currency]
+        rate = fx.convert_as_of(pd.Series(1.0, index=dates), dates, fx.BASE_CURRENCY, from_currency=currency)
+        rates[columns] = np.repeat(rate.to_numpy()[:, None], len(columns), axis=1)
+    return rates
+
+
+def portfolio_snapshot(user_id):
+    """
+    Load the ledger and prices and value the portfolio in INR.
+    Returns None when the user has no transactions, otherwise a dict with the
+    per-symbol `values`, `prices` and `adjusted_prices` frames, `current` holdings, `by_class`
+    daily values, `transactions`, `net_invested` and any `stale` price symbols.
+    Prices, trade prices and cash flows are converted to INR at each date's rate.
+    """
+    transactions = load_transactions(user_id)
+    if transactions.empty:
+        return None
+
+    symbols = sorted(transactions['symbol'].unique())
+    period = history_period(transactions['date'].min())
+    histories, stale, _ = fetch_histories(symbols, period=period)
+    closes = price_matrix(histories, 'Close')
+
+    start = transactions['date'].min()
+    dates = pd.bdate_range(start, pd.Timestamp.today().normalize())
+    closes = closes.reindex(closes.index.union(dates)).ffill().reindex(dates) if not closes.empty \
+        else pd.DataFrame(index=dates, columns=symbols, dtype=float)
+
+    # Split and dividend adjustment is relative to the raw quotes, so it is taken before conversion
+    factors = price_store.adjustment_factors(closes)
+    rates = inr_rates(symbols, dates.union(pd.DatetimeIndex(transactions['date'].unique())))
+    trade_rates = rates.to_numpy()[rates.index.get_indexer(transactions['date']),
+                                   rates.columns.get_indexer(transactions['symbol'])]
+    transactions = transactions.assign(price=transactions['price'] * trade_rates,
+                                       cash_flow=transactions['cash_flow'] * trade_rates)
+    closes = closes * rates.reindex(index=closes.index, columns=closes.columns)
+
+    values, current, prices = mark_to_market(transactions, closes)
+    class_of = transactions.groupby('symbol')['asset_class'].last()
+    by_class = values.T.groupby(class_of).sum().T
+
+    return {
+        'transactions': transactions,
+        'values': values,
+        'prices': prices,
+        'adjusted_prices': prices * factors.reindex(index=prices.index, columns=prices.columns).fillna(1.0),
+        'current': current,
+        'by_class': by_class,
+        'net_invested': -transactions['cash_flow'].sum(),
+        'stale': stale,
+    }
@@ -0,0 +1,212 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# ============ LOCAL PRICE STORE ============
+# Raw daily OHLC plus split and dividend events, persisted in SQLite.
+# Adjusted closes are forward-adjusted: every event multiplies the prices from
+# its ex-date onward, so the earliest stored prices never change and a new
+# event or new bars only rewrite rows from the affected date forward.
+
+DB_PATH = 'finance_tracker.db'
+
+
+def create_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS price_history
+                 (symbol TEXT,
+                  date TEXT,
+                  open REAL,
+                  high REAL,
+                  low REAL,
+                  close REAL,
+                  volume REAL,
+                  adj_factor REAL,
+                  adj_close REAL,
+                  PRIMARY KEY (symbol, date))''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS corporate_actions
+                 (symbol TEXT,
+                  date TEXT,
+                  split_ratio REAL,
+                  dividend REAL,
+                  PRIMARY KEY (symbol, date))''')
+
+
+def _naive_day_strings(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize().strftime("%Y-%m-%d")
+
+
+def save_history(symbol, hist, conn=None):
+    """
+    Upsert raw OHLC bars and any Dividends / Stock Splits events from a
+    provider history frame, then recompute adjustments from the earliest
+    date that changed. Returns that date, or None when nothing changed.
+    """
+    if hist is None or hist.empty:
+        return None
+    own_conn = conn is None
+    conn = conn or sqlite3.connect(DB_PATH)
+    try:
+        c = conn.cursor()
+        dates = _naive_day_strings(hist.index)
+
+        c.execute("SELECT MIN(date), MAX(date) FROM price_history WHERE symbol = ?", (symbol,))
+        first_stored, last_stored = c.fetchone()
+        c.execute("SELECT date, split_ratio, dividend FROM corporate_actions WHERE symbol = ?", (symbol,))
+        known_events = {row[0]: (row[1], row[2]) for row in c.fetchall()}
+
+        volume = hist['Volume'] if 'Volume' in hist else pd.Series(0, index=hist.index)
+        c.executemany("""
+            INSERT INTO price_history (symbol, date, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(symbol, date) DO UPDATE SET
+                open = excluded.open, high = excluded.high, low = excluded.low,
+                close = excluded.close, volume = excluded.volume
+        """, list(zip([symbol] * len(hist), dates,
+                      hist['Open'].astype(float), hist['High'].astype(float),
+                      hist['Low'].astype(float), hist['Close'].astype(float),
+                      volume.fillna(0).astype(float))))
+
+        if last_stored is None or dates[0] < first_stored:
+            # First load, or older history than we had: the anchor moved
+            changed = [dates[0]]
+        else:
+            # New bars, plus the last stored bar which may have been revised
+            changed = [d for d in dates if d >= last_stored]
+
+        splits = hist['Stock Splits'] if 'Stock Splits' in hist else pd.Series(0.0, index=hist.index)
+        dividends = hist['Dividends'] if 'Dividends' in hist else pd.Series(0.0, index=hist.index)
+        events = []
+        for date, split, dividend in zip(dates, splits.fillna(0).astype(float), dividends.fillna(0).astype(float)):
+            if split == 0 and dividend == 0:
+                continue
+            split = split or 1.0
+            if known_events.get(date) != (split, dividend):
+                events.append((symbol, date, split, dividend))
+                changed.append(date)
+        c.executemany("""
+            INSERT OR REPLACE INTO corporate_actions (symbol, date, split_ratio, dividend)
+            VALUES (?, ?, ?, ?)
+        """, events)
+
+        from_date = min(changed) if changed else None
+        if from_date is not None:
+            recompute_adjustments(conn, symbol, from_date)
+        conn.commit()
+        return from_date
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def recompute_adjustments(conn, symbol, from_date):
+    """Rewrite adj_factor and adj_close for rows on or after `from_date`."""
+    c = conn.cursor()
+    # Factor and close of the last untouched bar seed the recomputation
+    c.execute("""
+        SELECT adj_factor, close FROM price_history
+        WHERE symbol = ? AND date < ? ORDER BY date DESC LIMIT 1
+    """, (symbol, from_date))
+    previous = c.fetchone()
+    base_factor = previous[0] if previous and previous[0] is not None else 1.0
+    previous_close = previous[1] if previous else np.nan
+
+    rows = pd.read_sql_query("""
+        SELECT p.date, p.close,
+               COALESCE(a.split_ratio, 1.0) AS split_ratio,
+               COALESCE(a.dividend, 0.0) AS dividend
+        FROM price_history p
+        LEFT JOIN corporate_actions a ON a.symbol = p.symbol AND a.date = p.date
+        WHERE p.symbol = ? AND p.date >= ?
+        ORDER BY p.date
+    """, conn, params=(symbol, from_date))
+    if rows.empty:
+        return
+
+    close = rows['close'].to_numpy(dtype=float)
+    prior_close = np.concatenate([[previous_close], close[:-1]])
+    # A dividend D on its ex-date scales later prices by prior / (prior - D)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dividend_step = np.where(
+            (rows['dividend'].to_numpy() > 0) & (prior_close > rows['dividend'].to_numpy()),
+            prior_close / (prior_close - rows['dividend'].to_numpy()), 1.0)
+    step = rows['split_ratio'].to_numpy(dtype=float) * dividend_step
+    factor = base_factor * np.cumprod(step)
+
+    c.executemany("""
+        UPDATE price_history SET adj_factor = ?, adj_close = ?
+        WHERE symbol = ? AND date = ?
+    """, list(zip(factor, close * factor, [symbol] * len(rows), rows['date'])))
+
+
+def adjustment_factors(prices, rebase=False):
+    """
+    Split and dividend adjustment factors for a raw close matrix (dates x
+    symbols), shaped like it. The stored factor is carried over dates the
+    store does not cover; symbols without stored history get 1.0. With
+    `rebase` each symbol's factors are divided by its latest one, so the
+    last price stays the actual quote and only earlier prices move.
+    """
+    factor = pd.DataFrame(1.0, index=prices.index, columns=prices.columns)
+    if prices.empty:
+        return factor
+    stored = load_closes(list(prices.columns), start=prices.index[0])
+    if stored.empty:
+        return factor
+    stored = stored.reindex(stored.index.union(prices.index)).ffill().reindex(prices.index)
+    factor = (stored.reindex(columns=prices.columns) / prices).ffill().bfill().fillna(1.0)
+    if rebase:
+        factor = factor / factor.iloc[-1]
+    return factor
+
+
+def adjust_closes(prices, rebase=False):
+    """Split- and dividend-adjusted version of a raw close matrix; see adjustment_factors()."""
+    return prices * adjustment_factors(prices, rebase)
+
+
+def split_factors(symbols, dates):
+    """
+    Cumulative stock split multiplier of each symbol on each of `dates`
+    (1.0 before its first stored split): one unit held before a 2:1 split
+    is two units from the ex-date on.
+    """
+    factors = pd.DataFrame(1.0, index=dates, columns=symbols)
+    if not len(symbols):
+        return factors
+    placeholders = ','.join('?' * len(symbols))
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(f"""
+        SELECT symbol, date, split_ratio FROM corporate_actions
+        WHERE symbol IN ({placeholders}) AND split_ratio != 1
+    """, conn, params=list(symbols))
+    conn.close()
+    if df.empty:
+        return factors
+    df['date'] = pd.to_datetime(df['date'])
+    ratios = df.pivot(index='date', columns='symbol', values='split_ratio').reindex(columns=symbols)
+    cumulative = ratios.fillna(1.0).cumprod()
+    return cumulative.reindex(cumulative.index.union(dates)).ffill().fillna(1.0).reindex(dates)
+
+
+def load_closes(symbols, start=None, adjusted=True):
+    """Wide dates x symbols frame of stored (adjusted or raw) closes."""
+    if not symbols:
+        return pd.DataFrame()
+    column = 'adj_close' if adjusted else 'close'
+    placeholders = ','.join('?' * len(symbols))
+    query = f"SELECT symbol, date, {column} AS value FROM price_history WHERE symbol IN ({placeholders})"
+    params = list(symbols)
+    if start is not None:
+        query += " AND date >= ?"
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    conn = sqlite3.connect(DB_PATH)
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    if df.empty:
+        return pd.DataFrame()
+    df['date'] = pd.to_datetime(df['date'])
+    return df.pivot(index='date', columns='symbol', values='value').sort_index()
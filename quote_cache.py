@@ -0,0 +1,179 @@
+import io
+import os
+import json
+import time
+import sqlite3
+import threading
+import pandas as pd
+
+# ============ SHARED QUOTE CACHE ============
+# Fetched histories stored in a small SQLite file that every Streamlit worker
+# process on the host opens. A worker that finds a fresh entry skips the
+# upstream call; a stale entry is refreshed by whichever worker claims its
+# lease first while the others wait for the result, so N workers make one
+# upstream request per symbol per refresh interval instead of N.
+# Histories are stored as JSON, never pickled: any process on the host can
+# write the file, so reading it must not be able to run code.
+
+QUOTE_CACHE_DB = os.getenv('MARKET_CACHE_DB', 'market_cache.db')
+# How long a refresh lease is held before another worker may take over
+LEASE_SECONDS = float(os.getenv('MARKET_CACHE_LEASE', '10'))
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def _connect(path=None):
+    path = path or QUOTE_CACHE_DB
+    conn = sqlite3.connect(path, timeout=5)
+    if path not in _schema_ready:
+        with _schema_lock:
+            if path not in _schema_ready:
+                # WAL lets readers in other processes proceed while one writes
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute('''CREATE TABLE IF NOT EXISTS quote_cache
+                                (provider TEXT,
+                                 symbol TEXT,
+                                 period TEXT,
+                                 fetched_at REAL,
+                                 payload BLOB,
+                                 lease_owner TEXT,
+                                 lease_until REAL,
+                                 PRIMARY KEY (provider, symbol, period))''')
+                conn.commit()
+                _schema_ready.add(path)
+    return conn
+
+
+def _encode(hist):
+    index = pd.DatetimeIndex(hist.index)
+    tz = str(index.tz) if index.tz is not None else None
+    frame = hist.copy()
+    # Exchange-local wall times plus the zone, so dates survive the round trip
+    frame.index = index.tz_localize(None) if tz else index
+    return json.dumps({
+        'tz': tz,
+        'name': index.name,
+        'frame': frame.to_json(orient='split', date_format='iso', date_unit='ns', double_precision=15),
+    })
+
+
+def _decode(payload):
+    """History from a stored payload, or None for anything unreadable (e.g. an old pickled entry)."""
+    try:
+        data = json.loads(payload)
+        frame = pd.read_json(io.StringIO(data['frame']), orient='split', dtype=False,
+                             convert_axes=False, convert_dates=False)
+        index = pd.to_datetime(frame.index)
+        frame.index = index.tz_localize(data['tz']) if data['tz'] else index
+        frame.index.name = data['name']
+        return frame
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def _owner():
+    return f"{os.getpid()}:{threading.get_ident()}"
+
+
+def get_many(provider, symbols, period, max_age=None):
+    """
+    Cached histories for `symbols` as a dict symbol -> (history, fetched_at
+    epoch seconds). With `max_age`, entries older than that are left out.
+    """
+    if not symbols:
+        return {}
+    placeholders = ','.join('?' * len(symbols))
+    query = f"""SELECT symbol, fetched_at, payload FROM quote_cache
+                WHERE provider = ? AND period = ? AND payload IS NOT NULL
+                AND symbol IN ({placeholders})"""
+    params = [provider, period] + list(symbols)
+    if max_age is not None:
+        query += " AND fetched_at >= ?"
+        params.append(time.time() - max_age)
+    conn = _connect()
+    try:
+        rows = conn.execute(query, params).fetchall()
+        entries = {symbol: (_decode(payload), fetched_at) for symbol, fetched_at, payload in rows}
+        unreadable = [symbol for symbol, (hist, _) in entries.items() if hist is None]
+        if unreadable:
+            # Mark them stale so the next claim() refetches instead of waiting for them to age out
+            conn.executemany("""
+                UPDATE quote_cache SET payload = NULL, fetched_at = NULL
+                WHERE provider = ? AND period = ? AND symbol = ?
+            """, [(provider, period, symbol) for symbol in unreadable])
+            conn.commit()
+    finally:
+        conn.close()
+    return {symbol: entry for symbol, entry in entries.items() if entry[0] is not None}
+
+
+def get(provider, symbol, period, max_age=None):
+    return get_many(provider, [symbol], period, max_age).get(symbol)
+
+
+def put(provider, symbol, period, hist):
+    """Store a fresh history and release this worker's lease on it."""
+    conn = _connect()
+    try:
+        conn.execute("""
+            INSERT INTO quote_cache (provider, symbol, period, fetched_at, payload, lease_owner, lease_until)
+            VALUES (?, ?, ?, ?, ?, NULL, NULL)
+            ON CONFLICT(provider, symbol, period) DO UPDATE SET
+                fetched_at = excluded.fetched_at, payload = excluded.payload,
+                lease_owner = NULL, lease_until = NULL
+        """, (provider, symbol, period, time.time(), _encode(hist)))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def claim(provider, symbol, period, max_age=0, lease_seconds=LEASE_SECONDS):
+    """
+    Try to take the refresh lease for a key. Returns True when this worker
+    should fetch upstream, False when another worker already is or has just
+    stored an entry younger than `max_age`.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        # The upsert only touches the row when no live lease exists and the
+        # entry is still stale, so exactly one concurrent claimant sees a
+        # changed row and nobody refetches a result published meanwhile.
+        cursor = conn.execute("""
+            INSERT INTO quote_cache (provider, symbol, period, lease_owner, lease_until)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(provider, symbol, period) DO UPDATE SET
+                lease_owner = excluded.lease_owner, lease_until = excluded.lease_until
+            WHERE (quote_cache.lease_until IS NULL OR quote_cache.lease_until < ?)
+              AND (quote_cache.fetched_at IS NULL OR quote_cache.fetched_at < ?)
+        """, (provider, symbol, period, _owner(), now + lease_seconds, now, now - max_age))
+        conn.commit()
+        return cursor.rowcount == 1
+    finally:
+        conn.close()
+
+
+def release(provider, symbol, period):
+    """Give up this worker's lease without storing anything (failed fetch)."""
+    conn = _connect()
+    try:
+        conn.execute("""
+            UPDATE quote_cache SET lease_owner = NULL, lease_until = NULL
+            WHERE provider = ? AND symbol = ? AND period = ? AND lease_owner = ?
+        """, (provider, symbol, period, _owner()))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def clear(provider=None):
+    conn = _connect()
+    try:
+        if provider is None:
+            conn.execute("DELETE FROM quote_cache")
+        else:
+            conn.execute("DELETE FROM quote_cache WHERE provider = ?", (provider,))
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,110 @@
+import re
+import numpy as np
+import pandas as pd
+
+# ============ RECURRING EXPENSE DETECTOR ============
+# Expenses are grouped by normalized description and amount band, and the
+# gaps between consecutive payments of each group are measured in one
+# vectorized pass over the whole history. Groups whose gaps cluster around a
+# known billing cycle are reported as recurring.
+
+AMOUNT_STEP = 0.15     # a jump of more than ~15% between sorted amounts starts a new band
+MAX_INTERVAL_CV = 0.25  # gaps may vary by this fraction of their median
+FIXED_AMOUNT_CV = 0.05  # a recurring charge this stable is a subscription
+
+# cycle name -> (min days, max days, occurrences per month)
+CYCLES = {
+    'Weekly': (6, 8, 52 / 12),
+    'Fortnightly': (13, 16, 26 / 12),
+    'Monthly': (26, 35, 1.0),
+    'Quarterly': (84, 98, 1 / 3),
+    'Yearly': (350, 380, 1 / 12),
+}
+MIN_OCCURRENCES = {'Yearly': 2, 'Quarterly': 3}
+DEFAULT_MIN_OCCURRENCES = 3
+
+_MONTH_WORDS = {'jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+                'january', 'february', 'march', 'april', 'june', 'july', 'august', 'september',
+                'october', 'november', 'december'}
+
+
+def normalize_description(text):
+    """Lower-case words only: 'NETFLIX.COM 8841 Oct' and 'Netflix com' match."""
+    text = re.sub(r'[^a-z ]+', ' ', str(text or '').lower())
+    words = [word for word in text.split() if len(word) > 1 and word not in _MONTH_WORDS]
+    return ' '.join(words)
+
+
+def detect_recurring(df, today=None):
+    """
+    Recurring payments in an expenses frame (date, amount, category,
+    description). Returns one row per detected series with its cycle,
+    typical amount, monthly cost, last and next expected date, and whether
+    it is a fixed-price subscription and still active.
+    """
+    columns = ['Name', 'Category', 'Cycle', 'Amount', 'Monthly Cost', 'Payments',
+               'Last Paid', 'Next Expected', 'Subscription', 'Active']
+    df = df[df['amount'] > 0]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+
+    description = df['description'] if 'description' in df else pd.Series('', index=df.index)
+    name = description.map(normalize_description)
+    # Expenses without a usable description are grouped by category instead
+    name = name.where(name != '', df['category'].str.lower())
+    data = pd.DataFrame({
+        'name': name.to_numpy(), 'category': df['category'].to_numpy(),
+        'date': pd.to_datetime(df['date']).dt.normalize().to_numpy(), 'amount': df['amount'].to_numpy(),
+    })
+
+    # Amount bands per name: sort by amount and cut wherever consecutive amounts
+    # differ by more than AMOUNT_STEP, so a bill that drifts a little stays in
+    # one band while distinct price points are separated
+    data = data.sort_values(['name', 'amount'])
+    log_amount = np.log(data['amount'].to_numpy())
+    new_name = data['name'].ne(data['name'].shift()).to_numpy()
+    jump = np.diff(log_amount, prepend=log_amount[0]) > np.log1p(AMOUNT_STEP)
+    data['band'] = np.cumsum(new_name | jump)
+    data = data.sort_values(['band', 'date'])
+    group = data.groupby(['name', 'band'], sort=False)
+    data['gap'] = group['date'].diff().dt.days
+
+    stats = group.agg(category=('category', 'last'), payments=('date', 'size'),
+                      last_paid=('date', 'max'), amount=('amount', 'median'),
+                      amount_mean=('amount', 'mean'), amount_std=('amount', 'std'),
+                      gap_median=('gap', 'median'), gap_std=('gap', 'std'))
+    stats = stats[stats['gap_median'].notna()]
+    if stats.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Classify every group's median gap against the cycle table at once
+    cycle = pd.Series(None, index=stats.index, dtype=object)
+    per_month = pd.Series(np.nan, index=stats.index)
+    for cycle_name, (low, high, frequency) in CYCLES.items():
+        match = stats['gap_median'].between(low, high)
+        cycle[match] = cycle_name
+        per_month[match] = frequency
+    min_payments = cycle.map(MIN_OCCURRENCES).fillna(DEFAULT_MIN_OCCURRENCES)
+    regular = (stats['gap_std'].fillna(0) <= MAX_INTERVAL_CV * stats['gap_median'])
+    found = cycle.notna() & regular & (stats['payments'] >= min_payments)
+    stats, cycle, per_month = stats[found], cycle[found], per_month[found]
+    if stats.empty:
+        return pd.DataFrame(columns=columns)
+
+    next_expected = stats['last_paid'] + pd.to_timedelta(stats['gap_median'].round(), unit='D')
+    amount_cv = stats['amount_std'].fillna(0) / stats['amount_mean']
+    result = pd.DataFrame({
+        'Name': stats.index.get_level_values('name').str.title(),
+        'Category': stats['category'].to_numpy(),
+        'Cycle': cycle.to_numpy(),
+        'Amount': stats['amount'].to_numpy(),
+        'Monthly Cost': (stats['amount'] * per_month).to_numpy(),
+        'Payments': stats['payments'].to_numpy(),
+        'Last Paid': stats['last_paid'].to_numpy(),
+        'Next Expected': next_expected.to_numpy(),
+        'Subscription': (amount_cv <= FIXED_AMOUNT_CV).to_numpy(),
+        # Still active unless a payment is overdue by more than half a cycle
+        'Active': (today - stats['last_paid'] <= pd.to_timedelta(stats['gap_median'] * 1.5, unit='D')).to_numpy(),
+    })
+    return result.sort_values(['Active', 'Monthly Cost'], ascending=[False, False]).reset_index(drop=True)
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# ============ PORTFOLIO RISK METRICS ============
+# All metrics are computed with NumPy over the aligned dates x symbols price
+# and value matrices produced by portfolio.portfolio_snapshot().
+
+TRADING_DAYS = 252
+TRADING_DAYS_PER_MONTH = 21
+RISK_FREE_RATE = 0.065  # annual, roughly the Indian 10-year G-Sec yield
+
+
+def asset_returns(prices):
+    """Simple daily returns of each column of a (T x N) price array."""
+    prices = np.asarray(prices, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = prices[1:] / prices[:-1] - 1.0
+    return np.where(np.isfinite(returns), returns, 0.0)
+
+
+def portfolio_returns(prices, values):
+    """
+    Daily portfolio returns weighted by the previous day's holdings values.
+    Using yesterday's weights keeps buys and sells (cash flows) out of the return.
+    """
+    returns = asset_returns(prices)
+    weights = np.asarray(values, dtype=float)[:-1]
+    total = weights.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily = (weights * returns).sum(axis=1) / total
+    return daily[total > 0]
+
+
+def max_drawdown(returns):
+    growth = np.cumprod(1.0 + returns)
+    peaks = np.maximum.accumulate(growth)
+    return float((growth / peaks - 1.0).min()) if len(growth) else 0.0
+
+
+def beta(returns, benchmark_returns):
+    if len(returns) < 2:
+        return float('nan')
+    cov = np.cov(returns, benchmark_returns)
+    return float(cov[0, 1] / cov[1, 1]) if cov[1, 1] > 0 else float('nan')
+
+
+def portfolio_risk(prices, values, benchmark=None, risk_free_rate=RISK_FREE_RATE):
+    """
+    Risk metrics for a portfolio.
+
+    prices and values are DataFrames with the same dates x symbols shape;
+    benchmark is an optional price Series of an index on the same dates.
+    Returns a dict of annualized metrics plus the asset correlation matrix.
+    """
+    daily = portfolio_returns(prices.to_numpy(), values.to_numpy())
+    if len(daily) < 2:
+        return None
+
+    mean = daily.mean()
+    volatility = daily.std(ddof=1) * np.sqrt(TRADING_DAYS)
+    annual_return = (1.0 + daily).prod() ** (TRADING_DAYS / len(daily)) - 1.0
+    excess = annual_return - risk_free_rate
+
+    downside = np.minimum(daily - risk_free_rate / TRADING_DAYS, 0.0)
+    downside_dev = np.sqrt((downside ** 2).mean()) * np.sqrt(TRADING_DAYS)
+
+    metrics = {
+        'annual_return': annual_return,
+        'monthly_return': (1.0 + mean) ** TRADING_DAYS_PER_MONTH - 1.0,
+        'volatility': volatility,
+        'sharpe': excess / volatility if volatility > 0 else float('nan'),
+        'sortino': excess / downside_dev if downside_dev > 0 else float('nan'),
+        'max_drawdown': max_drawdown(daily),
+        'beta': float('nan'),
+    }
+
+    if benchmark is not None:
+        bench = asset_returns(benchmark.reindex(prices.index).ffill().to_numpy()[:, None])[:, 0]
+        held = np.asarray(values, dtype=float)[:-1].sum(axis=1) > 0
+        metrics['beta'] = beta(daily, bench[held])
+
+    # Correlation only over symbols that were actually held at some point
+    held_symbols = values.columns[(values.to_numpy() != 0).any(axis=0)]
+    held_returns = asset_returns(prices[held_symbols].to_numpy())
+    if held_returns.shape[1] > 1:
+        corr = np.corrcoef(held_returns, rowvar=False)
+        metrics['correlation'] = pd.DataFrame(corr, index=held_symbols, columns=held_symbols)
+    else:
+        metrics['correlation'] = None
+    return metrics
+
+
+# ============ BENCHMARK COMPARISON ============
+
+BENCHMARKS = {'NIFTY 50': '^NSEI', 'S&P 500': '^GSPC'}
+
+
+def time_weighted_index(prices, values):
+    """
+    Cumulative time-weighted growth of 1 unit invested, indexed by date.
+    Daily returns use the previous day's holdings, so deposits and
+    withdrawals do not count as performance.
+    """
+    returns = asset_returns(prices.to_numpy())
+    weights = values.to_numpy(dtype=float)[:-1]
+    total = weights.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily = np.where(total > 0, (weights * returns).sum(axis=1) / total, 0.0)
+    held = np.flatnonzero(total > 0)
+    if len(held) == 0:
+        return pd.Series(dtype=float)
+    # The index starts at 1.0 on the first date with holdings
+    first = held[0]
+    growth = np.concatenate([[1.0], np.cumprod(1.0 + daily[first:])])
+    return pd.Series(growth, index=prices.index[first:])
+
+
+def benchmark_comparison(prices, values, benchmark_closes):
+    """
+    Cumulative returns in percent of the portfolio and each benchmark over the
+    same dates. benchmark_closes maps a display name to a Close price Series.
+    """
+    portfolio = time_weighted_index(prices, values)
+    if portfolio.empty:
+        return pd.DataFrame()
+    comparison = {'Portfolio': portfolio}
+    for name, close in benchmark_closes.items():
+        aligned = close.reindex(close.index.union(portfolio.index)).ffill().reindex(portfolio.index)
+        first = aligned.first_valid_index()
+        if first is not None:
+            comparison[name] = aligned / aligned.loc[first]
+    return (pd.DataFrame(comparison) - 1.0) * 100
@@ -0,0 +1,191 @@
+import re
+import sqlite3
+import threading
+import pandas as pd
+import anomalies
+import budgets
+from expenses import bump_revision
+
+# ============ CATEGORIZATION RULES ============
+# User rules such as "description contains SWIGGY -> Wants" are compiled into
+# one regular expression per user. Each rule becomes a lookahead alternative
+# anchored at the start of the description, so a single match per description
+# finds the first rule (in priority order) that applies anywhere in it, and
+# the named group that matched identifies the rule.
+
+DB_PATH = 'finance_tracker.db'
+
+_compiled = {}  # user_id -> (rules, (compiled pattern, group name -> category) or None)
+_compiled_lock = threading.Lock()
+
+# A rule pattern is embedded in the combined pattern, so anything that refers
+# to groups by number or name, or sets global flags, would change meaning or
+# break it: backreferences like \1 and conditionals like (?(1)...) (an
+# unescaped backslash-digit or "(?(")
+_GROUP_REFERENCE = re.compile(r'(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?\()')
+
+
+def create_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS categorization_rules
+                 (id INTEGER PRIMARY KEY,
+                  user_id INTEGER,
+                  pattern TEXT,
+                  is_regex INTEGER DEFAULT 0,
+                  category TEXT,
+                  priority INTEGER DEFAULT 0)''')
+
+
+def _rule_regex(pattern, is_regex):
+    return pattern if is_regex else re.escape(pattern.strip())
+
+
+def validate_rule(pattern, is_regex, user_id=None):
+    """
+    Error message for an unusable rule pattern, or None. With a user_id the
+    pattern is also compiled together with that user's existing rules, the
+    way it will actually run.
+    """
+    if not pattern or not pattern.strip():
+        return "The pattern is empty."
+    regex = _rule_regex(pattern, is_regex)
+    try:
+        compiled = re.compile(regex, re.IGNORECASE)
+    except re.error as e:
+        return f"Invalid regular expression: {e}"
+    if compiled.groupindex:
+        return "Named groups are not supported in rules; use (...) or (?:...) instead."
+    if _GROUP_REFERENCE.search(regex):
+        return "Backreferences and conditional groups are not supported in rules."
+    try:
+        compile_rules([(0, pattern, is_regex, '', 0)] if user_id is None
+                      else get_rules(user_id) + [(0, pattern, is_regex, '', 0)])
+    except re.error as e:
+        if 'global flags' in str(e):
+            return "Inline flags such as (?i) must be scoped, e.g. (?i:...); rules already ignore case."
+        return f"Invalid regular expression: {e}"
+    return None
+
+
+def get_rules(user_id):
+    """Rules in the order they are tried: priority, then creation."""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        SELECT id, pattern, is_regex, category, priority FROM categorization_rules
+        WHERE user_id = ? ORDER BY priority DESC, id
+    """, (user_id,))
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+
+def add_rule(user_id, pattern, category, is_regex=False, priority=0):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("""
+        INSERT INTO categorization_rules (user_id, pattern, is_regex, category, priority)
+        VALUES (?, ?, ?, ?, ?)
+    """, (user_id, pattern.strip() if not is_regex else pattern, int(is_regex), category, priority))
+    conn.commit()
+    conn.close()
+
+
+def delete_rule(user_id, rule_id):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM categorization_rules WHERE user_id = ? AND id = ?", (user_id, rule_id))
+    conn.commit()
+    conn.close()
+
+
+def compile_rules(rules):
+    """One case-insensitive pattern for all rules, and the category of each named group."""
+    alternatives, categories = [], {}
+    for rule_id, pattern, is_regex, category, _ in rules:
+        group = f"rule{rule_id}"
+        alternatives.append(f"(?=.*?(?P<{group}>{_rule_regex(pattern, is_regex)}))")
+        categories[group] = category
+    return re.compile("^(?:" + "|".join(alternatives) + ")", re.IGNORECASE | re.DOTALL), categories
+
+
+def get_compiled_rules(user_id):
+    """
+    The user's compiled rules, recompiled only when the rule set changes;
+    None without usable rules. Rules that fail validation (saved before it
+    was tightened) are skipped rather than breaking every match.
+    """
+    rules = get_rules(user_id)
+    if not rules:
+        return None
+    with _compiled_lock:
+        cached = _compiled.get(user_id)
+        if cached is not None and cached[0] == rules:
+            return cached[1]
+    usable = [rule for rule in rules if validate_rule(rule[1], rule[2]) is None]
+    try:
+        compiled = compile_rules(usable) if usable else None
+    except re.error:
+        compiled = None
+    with _compiled_lock:
+        _compiled[user_id] = (rules, compiled)
+    return compiled
+
+
+def match_categories(user_id, descriptions):
+    """
+    Category of the first matching rule for every description (a Series of
+    the same index; None where no rule matches).
+    """
+    descriptions = pd.Series(descriptions).fillna('').astype(str)
+    compiled = get_compiled_rules(user_id)
+    if compiled is None or descriptions.empty:
+        return pd.Series(None, index=descriptions.index, dtype=object)
+    pattern, categories = compiled
+    # Histories repeat the same merchant strings, so each distinct one is matched once
+    unique = pd.Series(descriptions.unique())
+    groups = unique.str.extract(pattern)[list(categories)]
+    # At most one rule group captures per description: the first that applied
+    matched = groups.notna()
+    rule = matched.idxmax(axis=1).where(matched.any(axis=1))
+    category = descriptions.map(dict(zip(unique, rule.map(categories)))).astype(object)
+    return category.where(category.notna(), None)
+
+
+def match_category(user_id, description):
+    """Category of the first rule matching one description, or None."""
+    compiled = get_compiled_rules(user_id)
+    if compiled is None or not description:
+        return None
+    pattern, categories = compiled
+    match = pattern.match(description)
+    if match is None:
+        return None
+    groups = match.groupdict()
+    return next(category for group, category in categories.items() if groups[group] is not None)
+
+
+def apply_rules_to_history(user_id):
+    """
+    Recategorize every past expense a rule matches. Budget counters of the
+    affected categories are recounted and their unusual-expense baselines
+    reset (they reseed from history on the next insert). Returns the number
+    of expenses changed.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    history = pd.read_sql_query("SELECT id, category, description FROM expenses WHERE user_id = ?",
+                                conn, params=(user_id,))
+    matched = match_categories(user_id, history['description'])
+    mask = matched.notna() & (matched != history['category'])
+    changed = history[mask].assign(new=matched[mask])
+    if changed.empty:
+        conn.close()
+        return 0
+
+    conn.executemany("UPDATE expenses SET category = ? WHERE id = ?",
+                     list(zip(changed['new'], changed['id'].astype(int))))
+    affected = set(changed['category']) | set(changed['new'])
+    for category in affected:
+        budgets.rebuild_spend(conn, user_id, category)
+        anomalies.reset_category(conn, user_id, category)
+    bump_revision(conn, user_id)
+    conn.commit()
+    conn.close()
+    return len(changed)
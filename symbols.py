@@ -0,0 +1,184 @@
+"""
+Ticker master for symbol autocomplete.
+
+data/symbols.csv is generated from the exchanges' published listings as a
+build step (the checked-in file is only a small seed of common symbols and
+indices). Regenerate it before deploying:
+
+    python symbols.py --download
+    python symbols.py --nse EQUITY_L.csv --nasdaq nasdaqtraded.txt
+"""
+import os
+import csv
+import bisect
+import difflib
+import argparse
+import tempfile
+import threading
+
+# ============ TICKER MASTER ============
+# A local NSE + US symbol list searched entirely in memory. The list is loaded
+# on first use into sorted key arrays, so a prefix lookup is two binary
+# searches and no keystroke ever needs the network.
+
+SYMBOL_MASTER_FILE = os.getenv(
+    'SYMBOL_MASTER_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'symbols.csv'))
+
+NSE_EQUITY_URL = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
+NASDAQ_TRADED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqtraded.txt"
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class SymbolIndex:
+    """
+    Sorted (key, row) pairs over each symbol, its code without the exchange
+    suffix, and every word of the company name. A prefix query is a bisect
+    range over the keys.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows  # list of (symbol, name, exchange)
+        pairs = set()
+        for i, (symbol, name, _) in enumerate(rows):
+            code = symbol.lower()
+            pairs.add((code, i))
+            pairs.add((code.split('.')[0].lstrip('^'), i))
+            pairs.add((name.lower(), i))
+            for word in name.lower().split():
+                pairs.add((word, i))
+        pairs = sorted(pairs)
+        self.keys = [key for key, _ in pairs]
+        self.row_ids = [i for _, i in pairs]
+        # Fuzzy candidates are bucketed by first letter to keep difflib cheap
+        self.by_letter = {}
+        for key in sorted(set(self.keys)):
+            self.by_letter.setdefault(key[:1], []).append(key)
+
+    def prefix(self, query, limit=10):
+        query = query.strip().lower()
+        if not query:
+            return []
+        lo = bisect.bisect_left(self.keys, query)
+        hi = bisect.bisect_left(self.keys, query + '\uffff', lo)
+        seen, results = set(), []
+        # An exact key sorts before its extensions, so exact matches come first
+        for j in range(lo, hi):
+            i = self.row_ids[j]
+            if i not in seen:
+                seen.add(i)
+                results.append(self.rows[i])
+                if len(results) >= limit:
+                    break
+        return results
+
+    def fuzzy(self, query, limit=10, cutoff=0.7):
+        query = query.strip().lower()
+        if not query:
+            return []
+        candidates = [key for key in self.by_letter.get(query[:1], [])
+                      if abs(len(key) - len(query)) <= 2]
+        matches = difflib.get_close_matches(query, candidates, n=limit, cutoff=cutoff)
+        results, seen = [], set()
+        for key in matches:
+            j = bisect.bisect_left(self.keys, key)
+            while j < len(self.keys) and self.keys[j] == key:
+                i = self.row_ids[j]
+                if i not in seen:
+                    seen.add(i)
+                    results.append(self.rows[i])
+                j += 1
+        return results[:limit]
+
+    def search(self, query, limit=10):
+        """Prefix matches, topped up with fuzzy matches for typos."""
+        results = self.prefix(query, limit)
+        if len(results) < limit:
+            for row in self.fuzzy(query, limit):
+                if row not in results:
+                    results.append(row)
+        return results[:limit]
+
+
+def load_symbol_master(path=SYMBOL_MASTER_FILE):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [(row['symbol'], row['name'], row['exchange']) for row in csv.DictReader(f)]
+
+
+def get_symbol_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SymbolIndex(load_symbol_master())
+    return _index
+
+
+def search_symbols(query, limit=10):
+    return get_symbol_index().search(query, limit)
+
+
+def build_symbol_master(nse_equity_csv=None, nasdaq_traded_txt=None, path=SYMBOL_MASTER_FILE):
+    """
+    Regenerate the master file from the exchanges' published lists:
+    NSE's EQUITY_L.csv and NASDAQ Trader's nasdaqtraded.txt (which also
+    covers NYSE listings). Rows already in the file are kept.
+    """
+    global _index
+    rows = {symbol: (symbol, name, exchange) for symbol, name, exchange in load_symbol_master(path)}
+    if nse_equity_csv:
+        with open(nse_equity_csv, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                symbol = f"{row['SYMBOL'].strip()}.NS"
+                rows[symbol] = (symbol, row['NAME OF COMPANY'].strip(), 'NSE')
+    if nasdaq_traded_txt:
+        exchanges = {'Q': 'NASDAQ', 'N': 'NYSE', 'A': 'NYSE', 'P': 'NYSE', 'Z': 'NYSE', 'V': 'NYSE'}
+        with open(nasdaq_traded_txt, encoding='utf-8') as f:
+            for row in csv.DictReader(f, delimiter='|'):
+                if row.get('Test Issue') == 'Y' or not row.get('Symbol') or not row.get('Security Name'):
+                    continue
+                # Yahoo writes share classes with a dash: BRK.B -> BRK-B
+                symbol = row['Symbol'].replace('.', '-')
+                exchange = exchanges.get(row.get('Listing Exchange'), 'US')
+                rows[symbol] = (symbol, row['Security Name'].strip(), exchange)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['symbol', 'name', 'exchange'])
+        writer.writerows(sorted(rows.values()))
+    _index = None
+
+
+def download_listings(directory):
+    """Fetch the NSE and NASDAQ Trader listings into `directory`; returns their paths."""
+    import requests
+    paths = []
+    for url in (NSE_EQUITY_URL, NASDAQ_TRADED_URL):
+        # NSE rejects requests without a browser-like user agent
+        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=30)
+        response.raise_for_status()
+        path = os.path.join(directory, os.path.basename(url))
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the ticker master from exchange listings.")
+    parser.add_argument('--download', action='store_true', help="Fetch the current NSE and NASDAQ Trader listings")
+    parser.add_argument('--nse', help="Local copy of NSE's EQUITY_L.csv")
+    parser.add_argument('--nasdaq', help="Local copy of NASDAQ Trader's nasdaqtraded.txt")
+    parser.add_argument('--output', default=SYMBOL_MASTER_FILE)
+    args = parser.parse_args()
+    if not (args.download or args.nse or args.nasdaq):
+        parser.error("pass --download or local --nse / --nasdaq listings")
+
+    with tempfile.TemporaryDirectory() as directory:
+        nse, nasdaq = download_listings(directory) if args.download else (args.nse, args.nasdaq)
+        build_symbol_master(nse, nasdaq, path=args.output)
+    print(f"Wrote {len(load_symbol_master(args.output)):,} symbols to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+# ============ WATCHLISTS ============
+# Each user keeps their own symbol list. Market refreshes are planned across
+# all recently active users so a symbol watched by many users is fetched once.
+
+DB_PATH = 'finance_tracker.db'
+
+DEFAULT_WATCHLIST = [
+    'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'WIPRO.NS',
+    'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA',
+]
+
+# Users seen within this window are considered active for refresh planning
+ACTIVE_WINDOW_MINUTES = 30
+
+# Yahoo codes of Indian indices, which carry no exchange suffix
+INDIAN_INDICES = {
+    '^NSEI', '^BSESN', '^NSEBANK', '^CNXIT', '^CNXAUTO', '^CNXFMCG', '^CNXPHARMA',
+    '^CNXMETAL', '^CNXREALTY', '^CNXENERGY', '^CNXINFRA', '^NSMIDCP', '^CRSLDX', '^INDIAVIX',
+}
+
+
+def symbol_market(symbol):
+    return 'Indian' if symbol.endswith(('.NS', '.BO')) or symbol in INDIAN_INDICES else 'US'
+
+
+def symbol_currency(symbol):
+    """Currency a symbol is quoted in."""
+    return 'INR' if symbol_market(symbol) == 'Indian' else 'USD'
+
+
+def normalize_symbol(symbol):
+    return symbol.strip().upper()
+
+
+def get_watchlist(user_id):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT symbol FROM watchlists WHERE user_id = ? ORDER BY id", (user_id,))
+    symbols = [row[0] for row in c.fetchall()]
+    conn.close()
+    return symbols
+
+
+def add_to_watchlist(user_id, symbol):
+    symbol = normalize_symbol(symbol)
+    if not symbol:
+        return False
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("INSERT OR IGNORE INTO watchlists (user_id, symbol, added_at) VALUES (?, ?, ?)",
+              (user_id, symbol, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    added = c.rowcount > 0
+    conn.commit()
+    conn.close()
+    return added
+
+
+def remove_from_watchlist(user_id, symbol):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("DELETE FROM watchlists WHERE user_id = ? AND symbol = ?", (user_id, symbol))
+    conn.commit()
+    conn.close()
+
+
+def ensure_default_watchlist(user_id):
+    """Give users without a watchlist the default symbols."""
+    if get_watchlist(user_id):
+        return
+    for symbol in DEFAULT_WATCHLIST:
+        add_to_watchlist(user_id, symbol)
+
+
+def touch_user(user_id):
+    """Mark the user as active so their symbols are included in shared refreshes."""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO user_activity (user_id, last_seen) VALUES (?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET last_seen = excluded.last_seen
+    """, (user_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+    conn.close()
+
+
+def plan_refresh(active_window_minutes=ACTIVE_WINDOW_MINUTES):
+    """
+    Return the deduplicated, sorted set of symbols watched by any active user.
+    Fetching this list in one batch serves every active dashboard.
+    """
+    cutoff = (datetime.now() - timedelta(minutes=active_window_minutes)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("""
+        SELECT DISTINCT w.symbol
+        FROM watchlists w
+        JOIN user_activity a ON a.user_id = w.user_id
+        WHERE a.last_seen >= ?
+        ORDER BY w.symbol
+    """, (cutoff,))
+    symbols = [row[0] for row in c.fetchall()]
+    conn.close()
+    return symbols